@@ -1,58 +1,301 @@
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from scripts.fetch_data import get_alarmas
-from datetime import datetime, timedelta
-from PIL import Image
-import requests
+from scripts.metricas import METRICAS
+from scripts.snapshot import SnapshotCache
+from scripts.almacen import LectorSnapshots
+from scripts.consultas import IndiceMultiple, IndiceSeriales, filtrar_gestor_y_tipo, filtrar_rango_fechas, resumen_puertos
+from scripts.cubo import CuboConteos
+from scripts.diferencias import preparar_diferencias
+from scripts.pivot import INDICE_PIVOT, MotorPivot
+from scripts.exportes import FORMATOS, CacheExportes, nombre_archivo, serializar, tamano_legible
+from scripts.ventanas import MIN_MINUTOS_FLAPPING, VENTANAS, DetectorFlapping
+from scripts.olt_api import (
+    COLUMNAS_HUAWEI,
+    COLUMNAS_ZTE,
+    consultar,
+    consultar_lote,
+    edad_resultado,
+    peticion_huawei,
+    peticion_para_alarma,
+    peticion_serial,
+    peticion_zte,
+    tabla_resultado,
+)
+from datetime import timedelta
 
 # --- CONFIGURACIÓN INICIAL ---
-img = Image.open("logo.png")
-st.set_page_config(page_title="ADCE", layout="wide", page_icon=img, initial_sidebar_state="expanded")
+@st.cache_resource(show_spinner=False)
+def cargar_logo():
+    """Favicon como data URI de 64 px, armado una vez por proceso.
+
+    Con una imagen o ruta, set_page_config decodifica y registra el PNG en cada
+    rerun; una URL la pasa tal cual.
+    """
+    import base64
+    from io import BytesIO
+    from PIL import Image
+
+    with Image.open("logo.png") as logo:
+        logo.thumbnail((64, 64))
+        buffer = BytesIO()
+        logo.save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+st.set_page_config(page_title="ADCE", layout="wide", page_icon=cargar_logo(), initial_sidebar_state="expanded")
 
 st.title("📊 ADCE ")
 st.caption ("Alarm Data Control Engine")
-# Control de actualización automática
-if "last_update" not in st.session_state:
-    st.session_state.last_update = datetime.now() - timedelta(minutes=16)
 
 #Funciones
 
-def consultar_serial_api(serial):
-    """Función para consultar la API"""
-    try:
-        url = f"{ngrok_base_url}/consulta_serial?serial={serial}"
-        response = requests.get(url, timeout=20)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": f"Error en la API: {response.status_code}"}
-    except Exception as e:
-        return {"error": f"Error de conexión: {str(e)}"}
+def cargar_alarmas():
+    """Ejecuta el pipeline incremental (HoraPeru ya viene parseada y ordenada desde la ingesta)."""
+    # Import diferido: las réplicas que leen snapshots de disco no cargan el pipeline ni requests
+    from scripts.fetch_data import get_alarmas
+
+    return get_alarmas(incremental=True)
 
-def actualizar_datos():
-    st.session_state.data = get_alarmas()
-    st.session_state.last_update = datetime.now()
+# Cada cuánto el servidor vuelve a descargar las alarmas
+INTERVALO_ACTUALIZACION = timedelta(minutes=15)
 
-# Actualización automática cada 15 min
-if datetime.now() - st.session_state.last_update > timedelta(minutes=15):
-    actualizar_datos()
+# Con ADCE_SNAPSHOT_DIR las réplicas no corren el pipeline: mapean el último snapshot
+# que publica el worker (python -m scripts.fetch_data) y revisan el puntero a menudo
+DIRECTORIO_SNAPSHOTS = os.environ.get("ADCE_SNAPSHOT_DIR")
+INTERVALO_LECTURA_DISCO = timedelta(seconds=30)
 
-# Botón manual
+# Motor de los filtros, la tabla dinámica y el top de OLT: pandas (por defecto) o duckdb
+MOTOR_CONSULTAS = os.environ.get("ADCE_MOTOR", "pandas").strip().lower()
+
+# Filas de la tabla dinámica por página (y opciones del selector de detalle)
+FILAS_POR_PAGINA = 50
+
+# Alarmas nuevas/despejadas que se listan y resaltado de filas con alarmas nuevas
+MAX_FILAS_CAMBIOS = 200
+ESTILO_NUEVA = "background-color: rgba(0, 174, 239, 0.18)"
+
+# Alarmas recientes que se muestran al encontrar un serial en el snapshot
+MAX_ALARMAS_SERIAL = 20
+
+@st.cache_resource
+def obtener_lector():
+    """Lector del directorio de snapshots del worker (modo réplica, ADCE_SNAPSHOT_DIR)."""
+    return LectorSnapshots(DIRECTORIO_SNAPSHOTS)
+
+@st.cache_resource
+def obtener_cache():
+    """Caché de alarmas compartida por todas las sesiones, refrescada por un hilo del servidor."""
+    if DIRECTORIO_SNAPSHOTS:
+        cache = SnapshotCache(obtener_lector(), ttl=INTERVALO_LECTURA_DISCO, preparar=preparar_diferencias)
+    else:
+        cache = SnapshotCache(cargar_alarmas, ttl=INTERVALO_ACTUALIZACION, preparar=preparar_diferencias)
+    cache.iniciar_programador()
+    return cache
+
+@st.cache_resource
+def obtener_motor_pivot():
+    """Caché LRU de tablas dinámicas compartida por todas las sesiones."""
+    return MotorPivot(max_entradas=32)
+
+@st.cache_resource
+def obtener_exportes():
+    """Archivos de descarga por versión del snapshot y filtros, compartidos por todas las sesiones."""
+    return CacheExportes()
+
+@st.cache_resource
+def obtener_detector_flapping():
+    """Conteos LOS por puerto y minuto, actualizados con cada snapshot nuevo y compartidos por todas las sesiones."""
+    return DetectorFlapping()
+
+cache = obtener_cache()
+
+# Botón manual: solo encola el refresco, la página sigue con el snapshot vigente
 if st.button("🔄 Actualizar datos ahora"):
-    actualizar_datos()
+    cache.solicitar_actualizacion()
+    st.toast("🔄 Actualización en cola; los datos nuevos aparecerán al terminar.")
 
 # --- Selector de tema ---
 
 
+@st.fragment(run_every=timedelta(seconds=30))
+def vigilar_snapshot(version_mostrada):
+    """Vuelve a dibujar la página cuando el servidor publica un snapshot nuevo (pantallas sin interacción)."""
+    if cache.estadisticas()["version"] != version_mostrada:
+        st.rerun()
+
 # --- CARGAR DATOS ---
-if "data" not in st.session_state:
-    actualizar_datos()
+# Cada sesión solo toma una referencia al snapshot compartido (no debe modificarse)
+try:
+    snapshot = cache.obtener()
+except FileNotFoundError:
+    # Réplica que arrancó antes de que el worker publique: el programador sigue reintentando
+    st.info("⏳ Esperando el primer snapshot del worker de ingesta; la página se actualizará sola.")
+    vigilar_snapshot(0)
+    st.stop()
+except Exception as e:
+    st.error(f"No se pudieron cargar los datos 😢 ({e}). Se reintentará automáticamente.")
+    vigilar_snapshot(0)
+    st.stop()
+df = snapshot.data
+stats = cache.estadisticas()
+
+vigilar_snapshot(snapshot.version)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def figura_top_olts(version, filtros, _contar):
+    """Gráfico de las 10 OLT con más alarmas, armado una vez por versión y filtros (plotly es lento de construir).
+
+    `_contar()` devuelve las alarmas por DEV (cubo de conteos o motor columnar).
+    """
+    import plotly.express as px
+
+    top_olts = _contar().head(10)
+    datos = pd.DataFrame({"DEV": top_olts.index.astype(str), "Cantidad": top_olts.to_numpy()})
+    return px.bar(datos, x="DEV", y="Cantidad", color="DEV", title="Top 10 OLT (filtrado)")
+
+def texto_edad(resultado):
+    """Antigüedad de una respuesta de la API para mostrar junto al resultado."""
+    origen = " (caché compartida)" if resultado.get("desde_cache") else ""
+    return f"🕒 Respuesta de hace {edad_resultado(resultado):.0f} s{origen}"
+
+def boton_exportar(nombre, base_archivo, clave, construir, index=False):
+    """Formato + botón para generar el archivo solo cuando se pide; luego se ofrece la descarga.
+
+    Si otra sesión ya generó el mismo archivo (misma versión y filtros) se descarga directamente.
+    """
+    formato = st.selectbox("Formato", list(FORMATOS), key=f"formato_{nombre}", label_visibility="collapsed")
+    clave = (snapshot.version,) + tuple(clave) + (formato,)
+    exportes = obtener_exportes()
+    archivo = exportes.obtener(clave)
+    if archivo is None and st.button(f"⚙️ Preparar {base_archivo}", key=f"preparar_{nombre}"):
+        with st.spinner("Generando archivo..."):
+            archivo = exportes.generar(clave, lambda: serializar(construir(), formato, index=index))
+    if archivo is not None:
+        st.download_button(
+            label=f"📥 Descargar {nombre_archivo(base_archivo, formato)} ({tamano_legible(len(archivo))})",
+            data=archivo,
+            file_name=nombre_archivo(base_archivo, formato),
+            mime=FORMATOS[formato][1],
+            key=f"descargar_{nombre}",
+        )
+
+def motor_efectivo():
+    """"duckdb" si se eligió con ADCE_MOTOR y está instalado; si no, "pandas" (sin importar duckdb)."""
+    if MOTOR_CONSULTAS != "duckdb":
+        return "pandas"
+    from scripts.columnar import motor_disponible
+    return "duckdb" if motor_disponible("duckdb") else "pandas"
+
+def obtener_consultas():
+    """Consultas DuckDB del snapshot vigente con ADCE_MOTOR=duckdb (si está instalado); None con pandas."""
+    if motor_efectivo() != "duckdb":
+        return None
+    from scripts.columnar import ConsultasDuckDB
+    return snapshot.derivado("consultas_duckdb", ConsultasDuckDB)
+
+def obtener_cubo():
+    """Conteos por día/Gestor/DEV/Hour/tipo del snapshot vigente (se construye una vez por versión)."""
+    return snapshot.derivado("cubo", CuboConteos)
+
+def resaltar_nuevas(columna):
+    """Para Styler.apply(axis=1): resalta la fila si tiene alarmas nuevas."""
+    def estilo(fila):
+        return [ESTILO_NUEVA if fila[columna] else ""] * len(fila)
+    return estilo
+
+def obtener_indice_puertos():
+    """Índice DEV/Cliente_puerto/SN/PN del snapshot vigente (se construye una vez por versión)."""
+    return snapshot.derivado("indice_puertos", lambda data: IndiceMultiple(data, ["DEV", "Cliente_puerto", "SN", "PN"]))
+
+st.caption(f"🕒 Última actualización: {df['HoraProceso'].max():%d/%m/%Y %H:%M:%S} | Registros cargados ({len(df)} registros)")
+st.sidebar.caption(
+    f"🗄️ Snapshot v{stats['version']} · edad {stats['edad_s'] / 60:.1f} min · "
+    f"aciertos {stats['hits']} / fallos {stats['misses']}"
+    + (" · 🔄 actualizando..." if stats["actualizando"] else "")
+)
+stats_pivot = obtener_motor_pivot().estadisticas()
+stats_exportes = obtener_exportes().estadisticas()
+st.sidebar.caption(
+    f"📊 Tablas dinámicas: {stats_pivot['entradas']} en caché · "
+    f"aciertos {stats_pivot['hits']} / fallos {stats_pivot['misses']} · "
+    f"📁 Exportes: {stats_exportes['archivos']} ({stats_exportes['mb']:.1f} MB), {stats_exportes['generados']} generados"
+)
+
+# --- 🔹 Cambios desde el refresco anterior (calculados al publicar el snapshot) ---
+# El primer snapshot del proceso no tiene con qué compararse
+diferencias = snapshot.derivado("diferencias", lambda data: None)
+if diferencias is not None:
+    col_nuevas, col_despejadas, col_activas = st.columns(3)
+    col_nuevas.metric("🆕 Nuevas desde el refresco anterior", f"{diferencias.nuevas:,}")
+    col_despejadas.metric("✅ Despejadas", f"{diferencias.despejadas:,}")
+    col_activas.metric("⏳ Siguen activas", f"{diferencias.persistentes:,}")
+    with st.expander("🆕 Ver alarmas nuevas y despejadas"):
+        columnas_cambios = ["Gestor", "DEV", "SN", "PN", "NAME_ALARM", "HoraPeru", "Cliente_puerto"]
+        tab_nuevas, tab_despejadas = st.tabs(["🆕 Nuevas", "✅ Despejadas"])
+        with tab_nuevas:
+            # Las más recientes primero (el snapshot está ordenado por HoraPeru)
+            recientes = df.iloc[diferencias.posiciones_nuevas[::-1][:MAX_FILAS_CAMBIOS]]
+            st.dataframe(recientes[[c for c in columnas_cambios if c in df.columns]], hide_index=True, use_container_width=True)
+        with tab_despejadas:
+            despejadas = diferencias.filas_despejadas.iloc[::-1].head(MAX_FILAS_CAMBIOS)
+            st.dataframe(despejadas[[c for c in columnas_cambios if c in despejadas.columns]], hide_index=True, use_container_width=True)
+        st.caption(
+            f"Se listan hasta {MAX_FILAS_CAMBIOS} por grupo · diferencia calculada en "
+            f"{diferencias.segundos * 1000:.0f} ms al publicar el snapshot"
+        )
 
-df = st.session_state.data
+# --- 🔹 Diagnóstico del pipeline: etapas del último refresco e historial reciente ---
+with st.sidebar.expander("🩺 Diagnóstico del pipeline"):
+    if MOTOR_CONSULTAS == "duckdb" and motor_efectivo() != "duckdb":
+        st.caption("Motor de consultas: pandas (ADCE_MOTOR=duckdb, pero duckdb no está instalado)")
+    else:
+        st.caption(f"Motor de consultas: {motor_efectivo()}")
+    if diferencias is not None:
+        st.caption(f"Diferencia con el snapshot anterior: {diferencias.segundos * 1000:.0f} ms")
+    ultimo = METRICAS.ultimo()
+    # En modo réplica el pipeline corre en el worker: se muestra lo que guardó en el puntero al publicar
+    publicado = obtener_lector().metadatos if DIRECTORIO_SNAPSHOTS else None
+    if publicado is not None:
+        st.caption(
+            f"Snapshot v{publicado['version']} publicado por el worker"
+            + (f" el {pd.Timestamp(publicado['publicado'], unit='s'):%d/%m/%Y %H:%M:%S} UTC" if publicado.get("publicado") else "")
+            + (f" · refresco de {publicado['segundos']:.2f} s" if publicado.get("segundos") is not None else "")
+            + f" · {publicado['filas']} filas"
+            + (f" · {publicado['memoria_mb']:.1f} MB" if publicado.get("memoria_mb") is not None else "")
+        )
+        for nombre, datos in publicado.get("cruce", {}).items():
+            st.caption(f"Cruce {nombre}: {datos['coincidencias']} / {datos['filas']} ({datos['tasa']:.1%})")
+        if publicado.get("etapas"):
+            st.dataframe(pd.DataFrame(publicado["etapas"]), hide_index=True, use_container_width=True)
+    elif ultimo is None:
+        st.caption("Aún no hay refrescos registrados en este proceso.")
+    else:
+        st.caption(
+            f"Último refresco: {ultimo['segundos']:.2f} s · {ultimo['filas']} filas"
+            + (f" · {ultimo['memoria_mb']:.1f} MB" if ultimo["memoria_mb"] is not None else "")
+            + (" · sin cambios (304)" if ultimo["reutilizado"] else "")
+            + (f" · ❌ {ultimo['error']}" if ultimo["error"] else "")
+        )
+        for nombre, datos in ultimo["cruce"].items():
+            st.caption(f"Cruce {nombre}: {datos['coincidencias']} / {datos['filas']} ({datos['tasa']:.1%})")
+        if ultimo["etapas"]:
+            st.dataframe(pd.DataFrame(ultimo["etapas"]), hide_index=True, use_container_width=True)
+
+        recientes = METRICAS.recientes()
+        historial = pd.DataFrame({
+            "Inicio": pd.to_datetime([r["inicio"] for r in recientes], unit="s"),
+            "Segundos": [r["segundos"] for r in recientes],
+        })
+        st.line_chart(historial, x="Inicio", y="Segundos", height=150)
+        st.download_button(
+            "⬇️ Métricas (JSON lines)",
+            data=METRICAS.exportar_jsonl(),
+            file_name="metricas_pipeline.jsonl",
+            mime="application/x-ndjson",
+        )
 
-st.caption(f"🕒 Última actualización: {pd.to_datetime(df['HoraProceso'], errors='coerce').max():%d/%m/%Y %H:%M:%S} | Registros cargados ({len(df)} registros)")
+# Tema vigente aunque no haya datos (el selector solo se muestra con datos)
+tema = st.session_state.get("tema", "Claro")
 
 if df.empty:
     st.error("No se pudieron cargar los datos 😢")
@@ -62,10 +305,9 @@ else:
 
     # FILTRO DE FECHAS
     if "HoraPeru" in df.columns:
-        df["HoraPeru"] = pd.to_datetime(df["HoraPeru"], errors="coerce", dayfirst=True)
-        df = df.dropna(subset=["HoraPeru"])
-        min_fecha = df["HoraPeru"].min().date()
-        max_fecha = df["HoraPeru"].max().date()
+        # El snapshot viene ordenado por HoraPeru: extremos y rango sin recorrer el frame
+        min_fecha = df["HoraPeru"].iloc[0].date()
+        max_fecha = df["HoraPeru"].iloc[-1].date()
 
         rango = st.sidebar.date_input(
             "📅 Rango de fechas",
@@ -76,15 +318,15 @@ else:
 
         if isinstance(rango, tuple) and len(rango) == 2:
             inicio, fin = rango
-            df_filtrado = df[
-                (df["HoraPeru"].dt.date >= inicio) &
-                (df["HoraPeru"].dt.date <= fin)
-            ]
+            df_filtrado = filtrar_rango_fechas(df, inicio, fin)
+            rango_filtro = (inicio, fin)
         else:
-            df_filtrado = df.copy()
+            df_filtrado = df
+            rango_filtro = None
     else:
         st.warning("⚠️ No existe la columna 'HoraPeru'.")
-        df_filtrado = df.copy()
+        df_filtrado = df
+        rango_filtro = None
 
     # FILTRO POR GESTOR (radio/selección en sidebar)
     st.sidebar.subheader("📡 Gestor")
@@ -100,28 +342,28 @@ else:
     # guardar en sesión para persistencia
     st.session_state.gestor_seleccionado = gestor_seleccionado
 
-    # Aplicar filtro base según el gestor (normalizamos a lower)
-    if gestor_seleccionado.lower() == "huawei":
-        df_filtrado = df_filtrado[df_filtrado["Gestor"].str.lower() == "huawei"]
-    elif gestor_seleccionado.lower() == "zte":
-        df_filtrado = df_filtrado[df_filtrado["Gestor"].str.lower() == "zte"]
-
     # --- Filtros adicionales dinámicos ---
+    # Opciones y contadores salen del cubo de conteos, no de recorrer las alarmas
+    cubo = obtener_cubo()
+    tipo_final, str_name = [], []
     if gestor_seleccionado.lower() == "huawei" and "TipoFinal" in df_filtrado.columns:
         tipo_final = st.sidebar.multiselect(
             "📂 TipoFinal (HUAWEI)",
-            options=sorted(df_filtrado["TipoFinal"].dropna().unique())
+            options=cubo.valores("TipoFinal", cubo.seleccion(rango_filtro, gestor_seleccionado))
         )
-        if tipo_final:
-            df_filtrado = df_filtrado[df_filtrado["TipoFinal"].isin(tipo_final)]
 
     elif gestor_seleccionado.lower() == "zte" and "strAckUserName" in df_filtrado.columns:
         str_name = st.sidebar.multiselect(
             "🏷️ Tipo alarma (ZTE)",
-            options=sorted(df_filtrado["strAckUserName"].dropna().unique())
+            options=cubo.valores("strAckUserName", cubo.seleccion(rango_filtro, gestor_seleccionado))
         )
-        if str_name:
-            df_filtrado = df_filtrado[df_filtrado["strAckUserName"].isin(str_name)]
+
+    # Gestor y tipos: máscaras de pandas o, con ADCE_MOTOR=duckdb, una consulta al motor columnar
+    consultas = obtener_consultas()
+    if consultas is not None:
+        df_filtrado = consultas.filtrar(rango_filtro, gestor_seleccionado, tipo_final, str_name)
+    else:
+        df_filtrado = filtrar_gestor_y_tipo(df_filtrado, gestor_seleccionado, tipo_final, str_name)
     if df_filtrado.empty:
         st.warning("⚠️ No se encontraron datos con los filtros seleccionados.")
 
@@ -137,38 +379,66 @@ else:
 
     # --- MOSTRAR RESULTADOS ---
     if not df_filtrado.empty:
-        st.info(f"📡 Gestor seleccionado: {gestor_seleccionado.upper()} | Registros: {len(df_filtrado)}")
+        filtros = (rango_filtro, gestor_seleccionado, tuple(sorted(tipo_final)), tuple(sorted(str_name)))
+        st.info(f"📡 Gestor seleccionado: {gestor_seleccionado.upper()} | Registros: {cubo.total(cubo.seleccion(*filtros))}")
 
         if {"DEV", "Cliente_puerto", "SN", "PN", "HoraPeru", "Hour", "SerialNo"}.issubset(df_filtrado.columns):
-            tabla_dinamica = pd.pivot_table(
-                df_filtrado,
-                index=["DEV", "Cliente_puerto", "SN", "PN", "HoraPeru"],
-                columns="Hour",
-                values="SerialNo",
-                aggfunc="count",
-                fill_value=0,
+            # Tabla compartida entre sesiones: se recalcula solo si cambia el snapshot o los filtros
+            vista = obtener_motor_pivot().vista(
+                snapshot.version, filtros, df_filtrado,
+                contar=None if consultas is None else lambda: consultas.conteo_pivot(*filtros),
             )
-            tabla_dinamica["Total"] = tabla_dinamica.sum(axis=1)
-            tabla_dinamica = tabla_dinamica.loc[:, (tabla_dinamica != 0).any(axis=0)]
-            tabla_dinamica = tabla_dinamica.sort_values(by="Total", ascending=False)
-            tabla_dinamica.columns = tabla_dinamica.columns.map(str)
-            tabla_dinamica = tabla_dinamica.reset_index()
-
-            st.dataframe(tabla_dinamica, use_container_width=True)
-
-            st.download_button(
-                label="📥 Descargar tabla (.csv)",
-                data=tabla_dinamica.to_csv().encode("utf-8"),
-                file_name="tabla_dinamica.csv",
-                mime="text/csv"
+            tabla_dinamica = vista.tabla
+            etiquetas = vista.etiquetas
+
+            # Búsqueda y paginación en el servidor: solo la página visible llega al navegador
+            col_busqueda, col_pagina = st.columns([3, 1])
+            with col_busqueda:
+                busqueda = st.text_input("🔍 Buscar por DEV / SN / PN", placeholder="OLT_MA5800_RIMAC 3-1")
+            posiciones = vista.buscar(busqueda)
+            total_paginas = vista.paginas(posiciones, FILAS_POR_PAGINA)
+            with col_pagina:
+                pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
+            tabla_pagina = vista.pagina(posiciones, pagina, FILAS_POR_PAGINA)
+
+            desde = (pagina - 1) * FILAS_POR_PAGINA
+            st.caption(
+                f"Mostrando {min(desde + 1, len(posiciones))}–{desde + len(tabla_pagina)} de {len(posiciones)} filas"
+                f" (de {len(vista)} en total, ordenadas por Total)"
             )
+            # Índice por fila de la tabla (una vez por snapshot) en lugar de máscaras sobre todo el frame
+            indice_filas = snapshot.derivado("indice_filas", lambda data: IndiceMultiple(data, INDICE_PIVOT))
+
+            if diferencias is not None:
+                # Alarmas nuevas de cada fila visible: solo se filtran las pocas filas nuevas
+                nuevas_pagina = []
+                for claves in tabla_pagina[INDICE_PIVOT].itertuples(index=False, name=None):
+                    nuevas = diferencias.nuevas_en(indice_filas.posiciones(*claves))
+                    if len(nuevas):
+                        nuevas = filtrar_gestor_y_tipo(df.iloc[nuevas], gestor_seleccionado, tipo_final, str_name)
+                    nuevas_pagina.append(len(nuevas))
+                tabla_pagina = tabla_pagina.assign(**{"🆕 Nuevas": nuevas_pagina})
+            if diferencias is not None and any(nuevas_pagina):
+                st.dataframe(tabla_pagina.style.apply(resaltar_nuevas("🆕 Nuevas"), axis=1), use_container_width=True)
+            else:
+                st.dataframe(tabla_pagina, use_container_width=True)
+
+            # Exportes generados a pedido (no en cada rerun) y guardados por versión + filtros
+            col_tabla, col_alarmas = st.columns(2)
+            with col_tabla:
+                st.caption("📥 Tabla dinámica completa")
+                boton_exportar("tabla", "tabla_dinamica", ("tabla",) + filtros, lambda: tabla_dinamica,
+                               index=True)
+            with col_alarmas:
+                st.caption("📦 Alarmas filtradas (sin tabla dinámica)")
+                boton_exportar("alarmas", "alarmas_filtradas", ("alarmas",) + filtros, lambda: df_filtrado)
 
             # --- DETALLE DE REGISTROS ---
             st.markdown("### 🔎 Detalle de registros")
             seleccion = st.selectbox(
                 "Selecciona una fila:",
-                tabla_dinamica.index,
-                format_func=lambda i: f"{tabla_dinamica.loc[i, 'DEV']} - {tabla_dinamica.loc[i, 'SN']}-{tabla_dinamica.loc[i, 'PN']}"
+                tabla_pagina.index,
+                format_func=lambda i: etiquetas[i]
             )
 
             if seleccion is not None:
@@ -182,69 +452,39 @@ else:
                 columnas_detalle = ["DEV", "Cliente_puerto", "SN", "PN", "HoraPeru", "AditionalInfo", "SerialNumber_TDP"]
                 columnas_existentes = [c for c in columnas_detalle if c in df_filtrado.columns]
 
-                detalle = df_filtrado[
-                    (df_filtrado["DEV"] == dev_sel) &
-                    (df_filtrado["Cliente_puerto"] == cliente_sel) &
-                    (df_filtrado["SN"] == sn_sel) &
-                    (df_filtrado["PN"] == pn_sel) &
-                    (df_filtrado["HoraPeru"] == hora_sel)
-                ][columnas_existentes]
+                posiciones_detalle = indice_filas.posiciones(dev_sel, cliente_sel, sn_sel, pn_sel, hora_sel)
+                detalle = df.iloc[posiciones_detalle]
+                if diferencias is not None:
+                    detalle = detalle.assign(Nueva=diferencias.es_nueva[posiciones_detalle])
+                    columnas_existentes = columnas_existentes + ["Nueva"]
+                detalle = filtrar_gestor_y_tipo(detalle, gestor_seleccionado, tipo_final, str_name)[columnas_existentes]
 
-                st.dataframe(detalle, use_container_width=True)
-                ngrok_base_url = "https://leilani-thimblelike-lucklessly.ngrok-free.dev"
+                if diferencias is not None and detalle["Nueva"].any():
+                    st.dataframe(detalle.style.apply(resaltar_nuevas("Nueva"), axis=1), use_container_width=True)
+                else:
+                    st.dataframe(detalle, use_container_width=True)
 
                 col1, col2 = st.columns(2)
                 with col2:
-                    st.download_button(
-                        label="📥 Descargar detalle (.csv)",
-                        data=detalle.to_csv(index=False).encode("utf-8"),
-                        file_name=f"detalle_{dev_sel}.csv",
-                        mime="text/csv"
+                    boton_exportar(
+                        "detalle", f"detalle_{dev_sel}",
+                        ("detalle",) + filtros + (dev_sel, cliente_sel, sn_sel, pn_sel, hora_sel),
+                        lambda: detalle,
                     )
                 with col1:
                     if st.button("👓 Consultar en Tiempo Real"):
                         try:
-                            # Detectar gestor y construir URL apropiada
+                            # Detectar gestor y construir la petición apropiada
                             if gestor_seleccionado.lower() == "huawei":
-                                # Huawei - formato actual
-                                sn_val = int(float(sn_sel)) if str(sn_sel).replace('.', '', 1).isdigit() else sn_sel
-                                pn_val = int(float(pn_sel)) if str(pn_sel).replace('.', '', 1).isdigit() else pn_sel
-                                params = {
-                                    "dev": dev_sel,
-                                    "fn": 0,
-                                    "sn": sn_val,
-                                    "pn": pn_val
-                                }
-                                url = f"{ngrok_base_url}/consulta"
+                                peticion = peticion_huawei(dev_sel, sn_sel, pn_sel)
                                 
                             elif gestor_seleccionado.lower() == "zte":
                                 # ZTE - buscar en datos originales para obtener IP y ONTID
-                                zte_match = df[
-                                    (df["DEV"] == dev_sel) & 
-                                    (df["Cliente_puerto"] == cliente_sel) &
-                                    (df["SN"] == sn_sel) & 
-                                    (df["PN"] == pn_sel)
-                                ].iloc[0] if not df[
-                                    (df["DEV"] == dev_sel) & 
-                                    (df["Cliente_puerto"] == cliente_sel) &
-                                    (df["SN"] == sn_sel) & 
-                                    (df["PN"] == pn_sel)
-                                ].empty else None
-                                
+                                posiciones = obtener_indice_puertos().posiciones(dev_sel, cliente_sel, sn_sel, pn_sel)
+                                zte_match = df.iloc[posiciones[0]] if len(posiciones) else None
                                 
-                                sn_val = int(float(sn_sel)) if str(sn_sel).replace('.', '', 1).isdigit() else sn_sel
-                                pn_val = int(float(pn_sel)) if str(pn_sel).replace('.', '', 1).isdigit() else pn_sel
                                 if zte_match is not None and "DID" in zte_match and "ONTID" in zte_match:
-                                    olt_ip = zte_match["DID"]
-                                    ontid = zte_match["ONTID"]
-                                    ontid_val = int(float(ontid)) if str(ontid).replace('.', '', 1).isdigit() else ontid
-                                    ponid = f"1-{ontid_val}-{sn_val}-{pn_val}"
-                                    
-                                    params = {
-                                        "oltid": olt_ip,
-                                        "ponid": ponid
-                                    }
-                                    url = f"{ngrok_base_url}/pruebazte"
+                                    peticion = peticion_zte(zte_match["DID"], zte_match["ONTID"], sn_sel, pn_sel)
                                 else:
                                     st.error("❌ No se encontraron datos necesarios (DID u ONTID) para consulta ZTE")
                                     st.stop()
@@ -252,19 +492,19 @@ else:
                                 st.error("❌ Gestor no soportado")
                                 st.stop()
 
-                            # Realizar consulta (código existente)
-                            response = requests.get(url, params=params)
+                            # Realizar consulta (con timeout y sesión compartida)
+                            resultado = consultar(peticion)
 
-                            if response.status_code == 200:
-                                try:
-                                    json_data = response.json()
-                                    df_json = pd.json_normalize(json_data)
+                            if resultado["status"] == 200:
+                                if resultado["ok"]:
+                                    df_json = pd.json_normalize(resultado["datos"])
+                                    st.caption(texto_edad(resultado))
                                     
                                     # Columnas según gestor
                                     if gestor_seleccionado.lower() == "huawei":
-                                        columnas_deseadas = ["ALIAS", "LSTDOWNTIME", "LSTUPTIME", "ONTID", "OperState"]
+                                        columnas_deseadas = COLUMNAS_HUAWEI
                                     else:
-                                        columnas_deseadas = ["ONUID", "OperState", "AUTHINFO", "LASTOFFTIME"]
+                                        columnas_deseadas = COLUMNAS_ZTE
                                     
                                     columnas_existentes = [c for c in columnas_deseadas if c in df_json.columns]
                                     df_mostrar = df_json[columnas_existentes]
@@ -275,14 +515,61 @@ else:
                                     else:
                                         st.warning("⚠️ No se encontraron columnas esperadas en la respuesta.")
                                         st.write(df_json.head())
-                                except Exception as e:
-                                    st.error(f"⚠️ Respuesta no es JSON válido: {e}")
-                                    st.text(response.text)
+                                else:
+                                    st.error(f"⚠️ {resultado['error']}")
+                                    st.text(resultado["texto"])
+                            elif resultado["status"] is not None:
+                                st.error(f"❌ Error {resultado['status']}: {resultado['texto']}")
                             else:
-                                st.error(f"❌ Error {response.status_code}: {response.text}")
+                                st.error(f"⚠️ Error al conectar: {resultado['error']}")
                         except Exception as e:
                             st.error(f"⚠️ Error al conectar: {e}")
 
+            # --- CONSULTA MASIVA EN TIEMPO REAL ---
+            st.markdown("### ⚡ Consulta masiva en tiempo real")
+            with st.form("consulta_masiva"):
+                filas_lote = st.multiselect(
+                    "Filas de la tabla (página actual):",
+                    tabla_pagina.index,
+                    format_func=lambda i: etiquetas[i]
+                )
+                seriales_lote = st.text_area("📋 Seriales (uno por línea):", placeholder="MSTC0940DFDA")
+                lanzar_lote = st.form_submit_button("⚡ Consultar seleccionados", type="primary")
+
+            if lanzar_lote:
+                peticiones, sin_datos = [], []
+                for i in filas_lote:
+                    fila_lote = tabla_dinamica.loc[i]
+                    posiciones = obtener_indice_puertos().posiciones(
+                        fila_lote["DEV"], fila_lote["Cliente_puerto"], fila_lote["SN"], fila_lote["PN"]
+                    )
+                    peticion = peticion_para_alarma(df.iloc[posiciones[0]], etiquetas[i]) if len(posiciones) else None
+                    if peticion is None:
+                        sin_datos.append(etiquetas[i])
+                    else:
+                        peticiones.append(peticion)
+                peticiones += [peticion_serial(s.strip()) for s in seriales_lote.splitlines() if s.strip()]
+
+                if sin_datos:
+                    st.warning(f"⚠️ Sin datos para consultar (DID/ONTID): {', '.join(sin_datos)}")
+
+                # Los resultados se van agregando a una sola tabla a medida que llegan
+                progreso = st.progress(0.0)
+                tabla_en_vivo = st.empty()
+                partes = []
+                for n, resultado in enumerate(consultar_lote(peticiones), start=1):
+                    partes.append(tabla_resultado(resultado))
+                    tabla_en_vivo.dataframe(pd.concat(partes, ignore_index=True), use_container_width=True)
+                    progreso.progress(n / len(peticiones), text=f"{n}/{len(peticiones)} consultas")
+
+                resultado_lote = pd.concat(partes, ignore_index=True) if partes else None
+                if resultado_lote is not None and "RX (dBm)" in resultado_lote.columns:
+                    resultado_lote = resultado_lote.sort_values("RX (dBm)", na_position="last")
+                    tabla_en_vivo.dataframe(resultado_lote, use_container_width=True)
+                st.session_state.resultado_lote = resultado_lote
+            elif st.session_state.get("resultado_lote") is not None:
+                st.dataframe(st.session_state.resultado_lote, use_container_width=True)
+
         # Inicializar estado de sesión
         if 'show_consultation' not in st.session_state:
             st.session_state.show_consultation = False
@@ -292,6 +579,7 @@ else:
         if st.button("🔎 Consultar Estado de ONT", type="primary", use_container_width=True):
             st.session_state.show_consultation = True
             st.session_state.consultation_result = None
+            st.session_state.serial_consultado = None
 
         # Mostrar formulario de consulta si está activo
         if st.session_state.show_consultation:
@@ -312,18 +600,52 @@ else:
                 with col2:
                     cancel_btn = st.form_submit_button("❌ Cancelar", use_container_width=True)
             
-            # Procesar formulario
+            # Procesar formulario: primero se busca en el snapshot; la OLT queda como segundo paso
             if submit_btn and serial_input:
-                with st.spinner("🔍 Consultando información del ONT..."):
-                    resultado = consultar_serial_api(serial_input.strip())
-                    st.session_state.consultation_result = resultado
-                    st.rerun()
+                st.session_state.serial_consultado = serial_input.strip()
+                st.session_state.consultation_result = None
             
             if cancel_btn:
                 st.session_state.show_consultation = False
                 st.session_state.consultation_result = None
+                st.session_state.serial_consultado = None
                 st.rerun()
 
+            serial_consultado = st.session_state.get("serial_consultado")
+            if serial_consultado:
+                # Índice de seriales y suscripciones (una vez por snapshot)
+                indice_seriales = snapshot.derivado("indice_seriales", IndiceSeriales)
+                modo, claves, posiciones = indice_seriales.buscar(serial_consultado)
+                encontradas = df.iloc[posiciones]
+                if modo is None:
+                    st.info(f"📭 {serial_consultado} no aparece en las alarmas del snapshot vigente.")
+                else:
+                    if modo == "exacta":
+                        st.success(f"📦 {serial_consultado} está en el snapshot: {len(encontradas)} alarmas")
+                    elif modo == "prefijo":
+                        st.info(f"🔤 Empiezan con {serial_consultado.upper()}: {', '.join(claves)}")
+                    else:
+                        st.warning(f"✏️ Sin coincidencia exacta. ¿Quisiste decir {', '.join(claves)}?")
+                    st.dataframe(resumen_puertos(encontradas), hide_index=True, use_container_width=True)
+                    with st.expander(f"🕒 Alarmas recientes (hasta {MAX_ALARMAS_SERIAL})"):
+                        columnas_serial = ["Gestor", "DEV", "SN", "PN", "Cliente_puerto", "NAME_ALARM", "HoraPeru",
+                                           "SerialNumber_TDP", "AditionalInfo"]
+                        recientes = encontradas.iloc[::-1].head(MAX_ALARMAS_SERIAL)
+                        st.dataframe(recientes[[c for c in columnas_serial if c in recientes.columns]],
+                                     hide_index=True, use_container_width=True)
+
+                # A la OLT va el serial del ONT cuando la coincidencia apunta a uno solo (p. ej. por suscripción)
+                seriales = (
+                    encontradas["SerialNumber_TDP"].dropna().unique() if "SerialNumber_TDP" in encontradas.columns else []
+                )
+                serial_api = str(seriales[0]) if len(seriales) == 1 else serial_consultado
+                if st.button(f"📡 Consultar {serial_api} en la OLT (tiempo real)", use_container_width=True):
+                    with st.spinner("🔍 Consultando información del ONT..."):
+                        respuesta = consultar(peticion_serial(serial_api))
+                        st.session_state.consultation_result = respuesta["datos"] if respuesta["ok"] else {"error": respuesta["error"]}
+                        st.session_state.consultation_meta = respuesta
+                        st.rerun()
+
         # Mostrar resultados si existen
         if st.session_state.consultation_result:
             st.markdown("---")
@@ -333,6 +655,8 @@ else:
                 st.error(f"❌ **Error en la consulta:** {resultado['error']}")
             else:
                 st.success("✅ **ONT encontrado exitosamente!**")
+                if st.session_state.get("consultation_meta"):
+                    st.caption(texto_edad(st.session_state.consultation_meta))
                 
                 # Crear pestañas para organizar la información
                 tab1, tab2, tab3 = st.tabs(["📊 Resumen", "🔧 Datos Técnicos", "📁 Raw Data"])
@@ -414,16 +738,38 @@ else:
                 st.session_state.consultation_result = None
                 st.rerun()
                 
+        # --- PUERTOS CON FLAPPING ---
+        st.markdown("### 📶 Puertos con flapping (PON/ONU LOS)")
+        detector = obtener_detector_flapping()
+        # Solo la primera sesión que ve un snapshot nuevo procesa la cola desde el anterior
+        detector.actualizar(snapshot.version, df)
+        col_ventana, col_minimo = st.columns([3, 1])
+        with col_ventana:
+            ventana = st.radio("Ventana", list(VENTANAS), index=1, horizontal=True)
+        with col_minimo:
+            minimo_minutos = st.number_input("Mín. minutos con LOS", min_value=1, value=MIN_MINUTOS_FLAPPING, step=1)
+
+        ranking = detector.ranking(ventana)
+        if gestor_seleccionado != "Ambos":
+            ranking = ranking[ranking["Gestor"].str.lower() == gestor_seleccionado.lower()]
+        flapping = ranking[ranking["Minutos con LOS"] >= minimo_minutos]
+        if detector.referencia is not None:
+            st.caption(
+                f"{len(flapping)} puertos con LOS en {minimo_minutos}+ minutos distintos · "
+                f"{int(flapping['Cliente_puerto'].sum())} clientes impactados · "
+                f"últimas {ventana} hasta {detector.referencia:%d/%m/%Y %H:%M} (sin filtro de fechas)"
+            )
+        st.dataframe(flapping.head(FILAS_POR_PAGINA), use_container_width=True, hide_index=True)
+        if not flapping.empty:
+            boton_exportar("flapping", "puertos_flapping", ("flapping", ventana, gestor_seleccionado, minimo_minutos), lambda: flapping)
+
         # --- GRÁFICO DE TOP OLT ---
         if "DEV" in df_filtrado.columns:
-            top_olts = (
-                df_filtrado.groupby("DEV")["DEV"]
-                .count()
-                .reset_index(name="Cantidad")
-                .sort_values(by="Cantidad", ascending=False)
-            )
-            grafico = px.bar(top_olts.head(10), x="DEV", y="Cantidad", color="DEV", title="Top 10 OLT (filtrado)")
-            st.plotly_chart(grafico, use_container_width=True)
+            if consultas is not None:
+                contar_olts = lambda: consultas.conteo_por("DEV", *filtros)
+            else:
+                contar_olts = lambda: cubo.conteo_por("DEV", cubo.seleccion(*filtros))
+            st.plotly_chart(figura_top_olts(snapshot.version, filtros, contar_olts), use_container_width=True)
     else:
         st.warning("😶 No hay registros en el rango seleccionado.")
 
@@ -436,26 +782,37 @@ if 'consultation_result' not in st.session_state:
     st.session_state.consultation_result = None
 
 
-# --- 🎨 Tema oscuro de lujo (corregido y completo) ---
-if tema == "Oscuro":
-    bg_color = "#F8DD65"        # Fondo principal negro profundo
-    panel_color = "#F9FC79"     # Sidebar azul noche
-    card_color = "#E6EE79"      # Cajas/tablas
-    text_color = "#E8ECF2"      # Blanco azulado suave
-    accent = "#00AEEF"          # Azul eléctrico
-    accent_hover = "#33CFFF"    # Azul más claro
-    border_color = "#1C2B3A"    # Bordes discretos
-else:
-    bg_color = "#F4FAFF"
-    panel_color = "#FFFFFF"
-    card_color = "#FFFFFF"
-    text_color = "#1E1E1E"
-    accent = "#009EF7"
-    accent_hover = "#38B6FF"
-    border_color = "#DDDDDD"
+# --- 🎨 Paletas de los temas (el oscuro corregido y completo) ---
+TEMAS = {
+    "Oscuro": {
+        "bg_color": "#F8DD65",        # Fondo principal negro profundo
+        "panel_color": "#F9FC79",     # Sidebar azul noche
+        "card_color": "#E6EE79",      # Cajas/tablas
+        "text_color": "#E8ECF2",      # Blanco azulado suave
+        "accent": "#00AEEF",          # Azul eléctrico
+        "accent_hover": "#33CFFF",    # Azul más claro
+        "border_color": "#1C2B3A",    # Bordes discretos
+    },
+    "Claro": {
+        "bg_color": "#F4FAFF",
+        "panel_color": "#FFFFFF",
+        "card_color": "#FFFFFF",
+        "text_color": "#1E1E1E",
+        "accent": "#009EF7",
+        "accent_hover": "#38B6FF",
+        "border_color": "#DDDDDD",
+    },
+}
 
 # --- 💅 Estilo global y de componentes ---
-st.markdown(f"""
+@st.cache_data(show_spinner=False)
+def css_tema(tema):
+    """Hoja de estilo y pie de página del tema, armados una vez por tema y proceso."""
+    paleta = TEMAS.get(tema, TEMAS["Claro"])
+    bg_color, panel_color, card_color = paleta["bg_color"], paleta["panel_color"], paleta["card_color"]
+    text_color, border_color = paleta["text_color"], paleta["border_color"]
+    accent, accent_hover = paleta["accent"], paleta["accent_hover"]
+    estilo = f"""
     <style>
     /* === FONDO GENERAL === */
     .stApp {{
@@ -576,11 +933,13 @@ st.markdown(f"""
         box-shadow: 0px 0px 12px {accent_hover}77 !important;
     }}
     </style>
-""", unsafe_allow_html=True)
-
-st.markdown(f"""
+"""
+    pie = f"""
 <hr style='margin-top: 40px; border-color:{accent};'>
 <div style='text-align:center; font-size:14px; color:{text_color};'>
     Desarrollado con 💚 by <b>AJ</b> — 2025
 </div>
-""", unsafe_allow_html=True)
+"""
+    return estilo + pie
+
+st.markdown(css_tema(tema), unsafe_allow_html=True)
@@ -0,0 +1,107 @@
+"""Benchmark de arranque y reruns de app.py con streamlit.testing (AppTest).
+
+Cada muestra de arranque en frío es un proceso nuevo (sin módulos importados):
+mide el import de los módulos de la app y el tiempo hasta el primer render. En
+el mismo proceso mide la latencia de reruns sin cambios (no-op). La app lee un
+snapshot sintético publicado en disco (ADCE_SNAPSHOT_DIR), así se mide la app
+y no la descarga de las hojas.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.arranque --filas 100000 --muestras 5 --reruns 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir_proceso(reruns):
+    """Corre dentro de un proceso nuevo: primer render y reruns no-op (segundos)."""
+    inicio = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import_streamlit = time.perf_counter() - inicio
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=300)
+    inicio = time.perf_counter()
+    at.run()
+    primer_render = time.perf_counter() - inicio
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    tiempos = []
+    for _ in range(reruns):
+        inicio = time.perf_counter()
+        at.run()
+        tiempos.append(time.perf_counter() - inicio)
+    modulos = sorted(m for m in ("plotly", "PIL", "requests") if m in sys.modules)
+    return {"import_streamlit_s": import_streamlit, "primer_render_s": primer_render,
+            "reruns_s": tiempos, "modulos_pesados": modulos}
+
+
+def preparar_snapshot(filas, directorio):
+    """Genera datos sintéticos, corre el pipeline contra el servidor local y publica el snapshot."""
+    from benchmarks import servidor_local, sinteticos
+    from scripts import almacen, fetch_data
+
+    datos = os.path.join(directorio, "datos")
+    sinteticos.generar(filas, datos)
+    servidor, base = servidor_local.iniciar_en_segundo_plano(datos)
+    servidor_local.apuntar_a(base)
+    original = os.getcwd()
+    os.chdir(datos)
+    try:
+        alarmas = fetch_data.get_alarmas()
+    finally:
+        os.chdir(original)
+        servidor.shutdown()
+    destino = os.path.join(directorio, "snapshots")
+    almacen.publicar(alarmas, destino)
+    return destino
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--muestras", type=int, default=3, help="Procesos en frío a medir")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(medir_proceso(args.reruns)))
+        return
+
+    with tempfile.TemporaryDirectory() as directorio:
+        entorno = dict(os.environ, ADCE_SNAPSHOT_DIR=preparar_snapshot(args.filas, directorio))
+        muestras = []
+        for _ in range(args.muestras):
+            inicio = time.perf_counter()
+            salida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.arranque", "--hijo", "--reruns", str(args.reruns)],
+                cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+            )
+            muestra = json.loads(salida.stdout.strip().splitlines()[-1])
+            muestra["proceso_s"] = time.perf_counter() - inicio
+            muestras.append(muestra)
+
+    reruns = [t for m in muestras for t in m["reruns_s"]]
+    primeros = [m["primer_render_s"] for m in muestras]
+    print(f"📏 {args.filas} filas · {args.muestras} arranques en frío · {args.reruns} reruns por arranque")
+    print(f"  primer render      : mediana {percentil(primeros, 50) * 1000:.0f} ms (máx {max(primeros) * 1000:.0f} ms)")
+    print(f"  proceso completo   : mediana {percentil([m['proceso_s'] for m in muestras], 50):.2f} s")
+    print(f"  rerun no-op        : p50 {percentil(reruns, 50) * 1000:.0f} ms · p95 {percentil(reruns, 95) * 1000:.0f} ms")
+    print(f"  módulos pesados tras el primer render: {muestras[0]['modulos_pesados']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Prueba de carga de app.py: N sesiones concurrentes con streamlit.testing (AppTest).
+
+Cada cantidad de sesiones se mide en un proceso nuevo que levanta el servidor
+local (hojas CSV + API OLT con latencia) y corre app.py descargando de él. Las
+sesiones comparten el proceso y los cachés de st.cache_resource, igual que en
+un servidor de Streamlit, y cada una ejecuta una mezcla de acciones de
+operador: cambiar el rango de fechas, cambiar de gestor, elegir una fila de la
+tabla dinámica y consultar el puerto en tiempo real.
+
+Por cantidad de sesiones reporta percentiles de latencia de los reruns (en
+total y por acción), el RSS del proceso (base, pico y final) y la memoria por
+sesión: RSS marginal sobre una sesión ya calentada (incluye lo que las acciones
+agregan a los cachés compartidos) y tamaño del session_state (KB).
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.carga --filas 100000 --sesiones 1,4,8,16 --acciones 20
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Peso de cada acción en la mezcla de una sesión
+ACCIONES = {"rango": 3, "gestor": 2, "fila": 4, "consulta": 1}
+
+
+def rss_mb():
+    """RSS actual del proceso (Linux: /proc/self/statm); en otros sistemas, el pico."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def tamano_estado_kb(at):
+    """Memoria aproximada del session_state de una sesión (DataFrames con deep=True)."""
+    total = 0
+    for valor in at.session_state.filtered_state.values():
+        if isinstance(valor, (pd.DataFrame, pd.Series)):
+            total += int(pd.DataFrame(valor).memory_usage(deep=True).sum())
+        elif isinstance(valor, (bytes, bytearray)):
+            total += len(valor)
+        else:
+            total += sys.getsizeof(valor)
+    return total / 2**10
+
+
+def _widget(lista, etiqueta):
+    return next((w for w in lista if w.label.startswith(etiqueta)), None)
+
+
+def _rango(at, rng):
+    fechas = _widget(at.date_input, "📅 Rango de fechas")
+    if fechas is None:
+        return at.run()
+    dias = pd.date_range(fechas.min, fechas.max, freq="D").date
+    inicio = rng.randrange(len(dias))
+    return fechas.set_value((dias[inicio], dias[rng.randrange(inicio, len(dias))])).run()
+
+
+def _gestor(at, rng):
+    gestor = _widget(at.selectbox, "Seleccionar Gestor:")
+    return gestor.set_value(rng.choice([o for o in gestor.options if o != gestor.value])).run()
+
+
+def _fila(at, rng):
+    fila = _widget(at.selectbox, "Selecciona una fila:")
+    if fila is None or not fila.options:
+        return at.run()
+    return fila.set_value(rng.randrange(len(fila.options))).run()
+
+
+def _consulta(at, rng):
+    # La consulta en tiempo real necesita un gestor concreto
+    gestor = _widget(at.selectbox, "Seleccionar Gestor:")
+    if gestor.value == "Ambos":
+        at = gestor.set_value(rng.choice(["HUAWEI", "ZTE"])).run()
+    boton = _widget(at.button, "👓 Consultar en Tiempo Real")
+    return at.run() if boton is None else boton.click().run()
+
+
+FUNCIONES = {"rango": _rango, "gestor": _gestor, "fila": _fila, "consulta": _consulta}
+
+
+def _runtime_compartido():
+    """Runtime de prueba único para el proceso, como el de un servidor con varias sesiones.
+
+    AppTest arma un Runtime simulado y activa global.appTest en cada run, y al
+    terminar deja Runtime._instance en None: con varias sesiones en hilos, un run
+    que termina le quita el Runtime (y la opción) a los que siguen corriendo. Acá
+    se arman una sola vez y las asignaciones de cada run van a una clase aparte.
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    config.set_option("global.appTest", True)
+    app_test.Runtime = type("RuntimePorRun", (), {"_instance": None})
+
+
+def _nueva_sesion():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=300)
+    at.run()
+    return at
+
+
+def medir_sesiones(datos, sesiones, acciones, latencia_api, semilla):
+    """Corre dentro de un proceso nuevo: `sesiones` sesiones concurrentes de `acciones` reruns cada una."""
+    from benchmarks import servidor_local
+
+    servidor, base = servidor_local.iniciar_en_segundo_plano(datos, latencia_api=latencia_api)
+    servidor_local.apuntar_a(base)
+    os.chdir(datos)
+    sys.path.insert(0, RAIZ)
+    _runtime_compartido()
+
+    # Sesión de calentamiento: descarga, snapshot y estructuras compartidas
+    inicio = time.perf_counter()
+    calentamiento = _nueva_sesion()
+    primer_render = time.perf_counter() - inicio
+    if calentamiento.exception:
+        raise RuntimeError(calentamiento.exception[0].message)
+    rss_base = rss_mb()
+
+    tiempos, errores, estados = [], [], []
+    lock = threading.Lock()
+    pico = [rss_base]
+    terminado = threading.Event()
+
+    def vigilar_rss():
+        while not terminado.wait(0.05):
+            pico[0] = max(pico[0], rss_mb())
+
+    def sesion(numero, barrera):
+        rng = random.Random(semilla + numero)
+        barrera.wait()
+        inicio = time.perf_counter()
+        at = _nueva_sesion()
+        registros = [("inicio", time.perf_counter() - inicio)]
+        for _ in range(acciones):
+            accion = rng.choices(list(ACCIONES), weights=list(ACCIONES.values()))[0]
+            inicio = time.perf_counter()
+            try:
+                at = FUNCIONES[accion](at, rng)
+            except Exception as e:
+                with lock:
+                    errores.append(f"{accion}: {e}")
+                continue
+            registros.append((accion, time.perf_counter() - inicio))
+            if at.exception:
+                with lock:
+                    errores.append(f"{accion}: {at.exception[0].message}")
+        with lock:
+            tiempos.extend(registros)
+            estados.append(tamano_estado_kb(at))
+            sesiones_vivas.append(at)  # se mantienen vivas hasta medir el RSS final
+
+    sesiones_vivas = []
+    barrera = threading.Barrier(sesiones)
+    hilos = [threading.Thread(target=sesion, args=(n, barrera), name=f"sesion-{n}") for n in range(sesiones)]
+    monitor = threading.Thread(target=vigilar_rss, daemon=True)
+    monitor.start()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    terminado.set()
+    rss_final = rss_mb()
+    servidor.shutdown()
+
+    return {
+        "sesiones": sesiones, "primer_render_s": primer_render, "duracion_s": duracion,
+        "tiempos": tiempos, "errores": errores[:20], "cantidad_errores": len(errores),
+        "rss_base_mb": rss_base, "rss_pico_mb": max(pico[0], rss_final), "rss_final_mb": rss_final,
+        "estado_kb": estados,
+    }
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def preparar_datos(filas, directorio):
+    """Exportes sintéticos (hojas y clientes) más el logo, que app.py lee del directorio de trabajo."""
+    from benchmarks import sinteticos
+
+    datos = os.path.join(directorio, "datos")
+    sinteticos.generar(filas, datos)
+    shutil.copy(os.path.join(RAIZ, "logo.png"), datos)
+    return datos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--sesiones", default="1,4,8,16", help="Cantidades de sesiones concurrentes a medir")
+    parser.add_argument("--acciones", type=int, default=20, help="Reruns por sesión")
+    parser.add_argument("--latencia-api", type=float, default=0.2, help="Latencia simulada del túnel (s)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Agrega una línea JSON por cantidad de sesiones")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--datos", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        resultado = medir_sesiones(args.datos, int(args.sesiones), args.acciones, args.latencia_api, args.semilla)
+        print(json.dumps(resultado))
+        return
+
+    entorno = {k: v for k, v in os.environ.items() if k != "ADCE_SNAPSHOT_DIR"}
+    filas_reporte = []
+    with tempfile.TemporaryDirectory() as directorio:
+        datos = preparar_datos(args.filas, directorio)
+        for sesiones in [int(n) for n in args.sesiones.split(",")]:
+            salida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.carga", "--hijo", "--datos", datos,
+                 "--sesiones", str(sesiones), "--acciones", str(args.acciones),
+                 "--latencia-api", str(args.latencia_api), "--semilla", str(args.semilla)],
+                cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+            )
+            resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+            reruns = [t for accion, t in resultado["tiempos"] if accion != "inicio"]
+            inicios = [t for accion, t in resultado["tiempos"] if accion == "inicio"]
+            fila = {
+                "sesiones": sesiones,
+                "reruns": len(reruns),
+                "p50_ms": percentil(reruns, 50) * 1000,
+                "p95_ms": percentil(reruns, 95) * 1000,
+                "p99_ms": percentil(reruns, 99) * 1000,
+                "inicio_p50_ms": percentil(inicios, 50) * 1000,
+                "reruns_s": len(reruns) / resultado["duracion_s"],
+                "rss_base_mb": resultado["rss_base_mb"],
+                "rss_pico_mb": resultado["rss_pico_mb"],
+                "rss_final_mb": resultado["rss_final_mb"],
+                "mb_por_sesion": (resultado["rss_final_mb"] - resultado["rss_base_mb"]) / sesiones,
+                "estado_kb": sum(resultado["estado_kb"]) / len(resultado["estado_kb"]),
+                "errores": resultado["cantidad_errores"],
+            }
+            for accion in ACCIONES:
+                tiempos = [t for nombre, t in resultado["tiempos"] if nombre == accion]
+                fila[f"{accion}_p95_ms"] = percentil(tiempos, 95) * 1000 if tiempos else float("nan")
+            filas_reporte.append(fila)
+            for error in resultado["errores"]:
+                print(f"  ⚠️ {sesiones} sesiones · {error}")
+            if args.salida:
+                with open(args.salida, "a", encoding="utf-8") as archivo:
+                    archivo.write(json.dumps(dict(fila, filas=args.filas, acciones=args.acciones)) + "\n")
+
+    print(f"📏 {args.filas} filas · {args.acciones} reruns por sesión · latencia API {args.latencia_api:.2f} s")
+    print(pd.DataFrame(filas_reporte).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
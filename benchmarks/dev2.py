@@ -0,0 +1,87 @@
+"""Paridad y tiempos de la llave DEV_2 / NAME_ALARM: versión por fila vs columnar.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.dev2 --filas 200000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.fetch_data import (
+    MAPEO_ALARMAS,
+    columna_por_valor_unico,
+    construir_dev2,
+    limpiar_num,
+    map_name_alarm,
+)
+
+
+def alarmas_sinteticas(filas, semilla=0):
+    """Columnas DEV/FN/SN/PN/FaultID con los tipos que deja read_csv (floats con NaN, texto)."""
+    rng = np.random.default_rng(semilla)
+    devs = np.array([f"OLT_MA5800_SEDE_{i}" for i in range(400)], dtype=object)
+    df = pd.DataFrame({
+        "DEV": rng.choice(devs, filas),
+        "FN": rng.integers(0, 2, filas).astype(float),
+        "SN": rng.integers(0, 18, filas).astype(float),
+        "PN": rng.integers(0, 16, filas).astype(float),
+        "FaultID": rng.choice(list(MAPEO_ALARMAS) + [0, 12345], filas),
+    })
+    # Casos borde: nulos, decimales, texto y números grandes
+    df.loc[df.sample(frac=0.01, random_state=1).index, "PN"] = np.nan
+    df.loc[df.sample(frac=0.001, random_state=2).index, "SN"] = 1.5
+    df.loc[df.sample(frac=0.001, random_state=3).index, "SN"] = 1e16
+    df["FN"] = df["FN"].astype(object)
+    df.loc[df.sample(frac=0.001, random_state=4).index, "FN"] = "A1"
+    df.loc[df.sample(frac=0.001, random_state=5).index, "FN"] = "07"
+    return df
+
+
+def dev2_por_fila(df):
+    """Implementación anterior con .apply(limpiar_num)."""
+    return (
+        df["DEV"].astype(str) + "-" +
+        df["FN"].apply(limpiar_num) + "-" +
+        df["SN"].apply(limpiar_num) + "-" +
+        df["PN"].apply(limpiar_num)
+    )
+
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo (s) de `repeticiones` ejecuciones y el último resultado."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    df = alarmas_sinteticas(args.filas)
+
+    t_antes, dev2_antes = medir(lambda: dev2_por_fila(df), args.repeticiones)
+    t_despues, dev2_despues = medir(lambda: construir_dev2(df), args.repeticiones)
+    pd.testing.assert_series_equal(dev2_antes, dev2_despues, check_names=False)
+
+    t_alarma_antes, nombre_antes = medir(lambda: df["FaultID"].apply(map_name_alarm), args.repeticiones)
+    t_alarma_despues, nombre_despues = medir(
+        lambda: columna_por_valor_unico(df["FaultID"], map_name_alarm), args.repeticiones
+    )
+    pd.testing.assert_series_equal(nombre_antes, nombre_despues, check_names=False)
+
+    print(f"✅ Paridad OK sobre {args.filas} filas")
+    print(f"DEV_2      : {t_antes * 1000:8.1f} ms → {t_despues * 1000:8.1f} ms ({t_antes / t_despues:.1f}x)")
+    print(f"NAME_ALARM : {t_alarma_antes * 1000:8.1f} ms → {t_alarma_despues * 1000:8.1f} ms "
+          f"({t_alarma_antes / t_alarma_despues:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Costo del detector de flapping: reconstrucción completa vs actualización incremental por refresco.
+
+Simula refrescos cada `--paso` minutos sobre los últimos `--refrescos` tramos
+del snapshot sintético (3 días de alarmas). En cada uno mide actualizar() de un
+detector que viene de los refrescos anteriores contra uno nuevo que procesa
+todo, verifica que los rankings coincidan y mide ranking() por ventana.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.flapping --tamano 1M --refrescos 6 --paso 15
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks import servidor_local, sinteticos
+from benchmarks.pipeline import TAMANOS, _reiniciar_estado
+from scripts import fetch_data
+from scripts.ventanas import LLAVE_PUERTO, VENTANAS, DetectorFlapping
+
+
+def _snapshot(nombre_tamano, directorio):
+    destino = os.path.join(directorio, nombre_tamano)
+    if not os.path.exists(os.path.join(destino, sinteticos.ARCHIVO_HUAWEI)):
+        sinteticos.generar(TAMANOS[nombre_tamano], destino)
+    servidor, base = servidor_local.iniciar_en_segundo_plano(destino)
+    servidor_local.apuntar_a(base)
+    original = os.getcwd()
+    os.chdir(destino)
+    try:
+        _reiniciar_estado()
+        return fetch_data.get_alarmas()
+    finally:
+        os.chdir(original)
+        servidor.shutdown()
+
+
+def _medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamano", default="100k", choices=list(TAMANOS))
+    parser.add_argument("--refrescos", type=int, default=6)
+    parser.add_argument("--paso", type=int, default=15, help="Minutos entre refrescos simulados")
+    parser.add_argument("--directorio", default=os.path.join(tempfile.gettempdir(), "adce_bench"))
+    args = parser.parse_args()
+
+    alarmas = _snapshot(args.tamano, args.directorio)
+    fin = alarmas["HoraPeru"].iloc[-1]
+    incremental = DetectorFlapping()
+    filas = []
+    for version in range(args.refrescos + 1):
+        corte = fin - pd.Timedelta(minutes=args.paso * (args.refrescos - version))
+        parte = alarmas.iloc[: alarmas["HoraPeru"].searchsorted(corte, side="right")]
+        recorridas, t_incremental = _medir(lambda: incremental.actualizar(version, parte))
+        completo = DetectorFlapping()
+        _, t_completo = _medir(lambda: completo.actualizar(version, parte))
+        filas.append({"version": version, "filas": len(parte), "recorridas": recorridas,
+                      "incremental_ms": t_incremental * 1000, "completo_ms": t_completo * 1000})
+
+    for ventana in VENTANAS:
+        obtenido, t_ranking = _medir(lambda: incremental.ranking(ventana))
+        esperado = completo.ranking(ventana)
+        pd.testing.assert_frame_equal(
+            obtenido.sort_values(LLAVE_PUERTO, ignore_index=True),
+            esperado.sort_values(LLAVE_PUERTO, ignore_index=True),
+            check_dtype=False,
+        )
+        print(f"ranking {ventana:>5}: {len(obtenido):>7} puertos en {t_ranking * 1000:.1f} ms (igual al completo)")
+
+    print(f"cubetas: {incremental.cubetas} · reconstrucciones: {incremental.reconstrucciones}")
+    print(pd.DataFrame(filas).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
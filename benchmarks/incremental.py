@@ -0,0 +1,117 @@
+"""Refresco incremental vs reconstrucción completa de get_alarmas(), con verificación de igualdad.
+
+Sobre una copia de los exportes sintéticos aplica cambios típicos entre dos
+refrescos de las hojas y, para cada escenario, compara el snapshot que deja el
+modo incremental (partiendo del snapshot anterior) con el de una
+reconstrucción completa sobre las mismas hojas:
+
+- sin_cambios: las hojas no cambian (304).
+- solo_hora_proceso: solo avanza HoraProceso (todas las filas se conservan).
+- cambios: bajas, alarmas modificadas y nuevas, con HoraProceso nueva.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.incremental --tamano 100k
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import servidor_local, sinteticos
+from benchmarks.pipeline import TAMANOS, _reiniciar_estado
+from scripts import fetch_data
+
+ARCHIVOS = (sinteticos.ARCHIVO_HUAWEI, sinteticos.ARCHIVO_ZTE)
+
+
+def _hora_proceso_nueva(hoja):
+    hora = pd.to_datetime(hoja["HoraProceso"]) + pd.Timedelta(minutes=15)
+    return hoja.assign(HoraProceso=hora.dt.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def _cambios(hoja, rng):
+    hoja = _hora_proceso_nueva(hoja)
+    hoja = hoja[rng.random(len(hoja)) >= 0.01].copy()
+    modificadas = rng.random(len(hoja)) < 0.01
+    hoja.loc[modificadas, "FaultID"] = "35273"
+    nuevas = hoja.sample(n=max(len(hoja) // 100, 1), random_state=0).copy()
+    nuevas["SerialNo"] = (hoja["SerialNo"].astype(np.int64).max() + 1 + np.arange(len(nuevas))).astype(str)
+    return pd.concat([hoja, nuevas], ignore_index=True)
+
+
+ESCENARIOS = {
+    "sin_cambios": lambda hoja, rng: None,
+    "solo_hora_proceso": lambda hoja, rng: _hora_proceso_nueva(hoja),
+    "cambios": _cambios,
+}
+
+
+def _escribir(directorio, hojas):
+    for archivo, hoja in hojas.items():
+        hoja.to_csv(os.path.join(directorio, archivo), index=False)
+
+
+def _ordenado(df):
+    return df.sort_values(["HoraPeru", "Gestor", "SerialNo"], kind="stable", ignore_index=True)
+
+
+def comparar(directorio, originales, escenario, rng):
+    """Snapshot incremental vs completo tras aplicar `escenario` a las hojas; devuelve tiempos."""
+    _escribir(directorio, originales)
+    _reiniciar_estado()
+    fetch_data.get_alarmas(incremental=True)
+
+    modificadas = {archivo: ESCENARIOS[escenario](hoja, rng) for archivo, hoja in originales.items()}
+    _escribir(directorio, {archivo: hoja for archivo, hoja in modificadas.items() if hoja is not None})
+
+    inicio = time.perf_counter()
+    incremental = fetch_data.get_alarmas(incremental=True)
+    t_incremental = time.perf_counter() - inicio
+
+    _reiniciar_estado()
+    inicio = time.perf_counter()
+    completo = fetch_data.get_alarmas()
+    t_completo = time.perf_counter() - inicio
+
+    pd.testing.assert_frame_equal(_ordenado(incremental), _ordenado(completo))
+    return {"escenario": escenario, "filas": len(completo),
+            "incremental_ms": t_incremental * 1000, "completo_ms": t_completo * 1000,
+            "hora_proceso": f"{incremental['HoraProceso'].max():%Y-%m-%d %H:%M}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamano", default="100k", choices=list(TAMANOS))
+    parser.add_argument("--directorio", default=os.path.join(tempfile.gettempdir(), "adce_bench"))
+    args = parser.parse_args()
+
+    origen = os.path.join(args.directorio, args.tamano)
+    if not os.path.exists(os.path.join(origen, sinteticos.ARCHIVO_HUAWEI)):
+        sinteticos.generar(TAMANOS[args.tamano], origen)
+
+    rng = np.random.default_rng(0)
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as copia:
+        # Las hojas se reescriben en cada escenario: se trabaja sobre una copia
+        shutil.copytree(origen, copia, dirs_exist_ok=True)
+        originales = {archivo: pd.read_csv(os.path.join(copia, archivo), dtype=str, keep_default_na=False)
+                      for archivo in ARCHIVOS}
+        servidor, base = servidor_local.iniciar_en_segundo_plano(copia)
+        servidor_local.apuntar_a(base)
+        os.chdir(copia)
+        try:
+            filas = [comparar(copia, originales, escenario, rng) for escenario in ESCENARIOS]
+        finally:
+            os.chdir(directorio_original)
+            servidor.shutdown()
+
+    print(pd.DataFrame(filas).round(1).to_string(index=False))
+    print("✅ snapshot incremental idéntico a la reconstrucción completa en todos los escenarios")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Memoria del snapshot de alarmas con lectura sin tipos (inferencia completa) vs ingesta tipada.
+
+"Antes" reproduce la ingesta original: pd.read_csv con inferencia y todas las
+columnas, enriquecida sobre el concat de ambas hojas. "Después" es el resultado
+de get_alarmas() con ESQUEMAS y columnas categóricas. También verifica que la
+tabla dinámica del snapshot categórico tenga las filas en el mismo orden que la
+de referencia con llaves de texto (incluido el desempate a igual Total).
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.memoria --tamanos 100k,1M
+"""
+import argparse
+import os
+import tempfile
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks import servidor_local, sinteticos
+from benchmarks.pipeline import TAMANOS, _reiniciar_estado
+from scripts import fetch_data
+from scripts.fetch_data import enriquecer, leer_csv, memoria_mb
+from scripts.pivot import INDICE_PIVOT, conteo_pivot_table, conteo_por_codigos, formatear_tabla
+
+
+def _leer(destino, archivo):
+    with open(os.path.join(destino, archivo), "rb") as f:
+        return f.read()
+
+
+def _llaves_pivot(tabla):
+    """Llaves de fila de la tabla dinámica en su orden, comparables entre texto y categorías."""
+    llaves = tabla[INDICE_PIVOT].copy()
+    for col in ("DEV", "Cliente_puerto"):
+        llaves[col] = llaves[col].astype(str)
+    for col in ("SN", "PN"):
+        llaves[col] = llaves[col].astype("int64")
+    return llaves.reset_index(drop=True)
+
+
+def verificar_orden_pivot(antes, despues):
+    """La tabla dinámica del snapshot tipado sale en el mismo orden que la de llaves de texto."""
+    esperado = formatear_tabla(conteo_pivot_table(antes))
+    obtenido = formatear_tabla(conteo_por_codigos(despues))
+    pd.testing.assert_frame_equal(_llaves_pivot(obtenido), _llaves_pivot(esperado))
+    pd.testing.assert_series_equal(obtenido["Total"], esperado["Total"], check_dtype=False)
+
+
+def comparar(nombre_tamano, filas, directorio):
+    destino = os.path.join(directorio, nombre_tamano)
+    if not os.path.exists(os.path.join(destino, sinteticos.ARCHIVO_HUAWEI)):
+        sinteticos.generar(filas, destino)
+
+    fuentes = {"Huawei": _leer(destino, sinteticos.ARCHIVO_HUAWEI), "ZTE": _leer(destino, sinteticos.ARCHIVO_ZTE)}
+    resultados = []
+    for gestor, contenido in fuentes.items():
+        inicio = time.perf_counter()
+        antes = pd.read_csv(BytesIO(contenido))
+        t_antes = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        despues = leer_csv(contenido, gestor)
+        t_despues = time.perf_counter() - inicio
+        resultados.append({"tamano": nombre_tamano, "objeto": f"crudo {gestor}",
+                           "antes_mb": memoria_mb(antes), "despues_mb": memoria_mb(despues),
+                           "antes_s": t_antes, "despues_s": t_despues})
+
+    servidor, base = servidor_local.iniciar_en_segundo_plano(destino)
+    servidor_local.apuntar_a(base)
+    directorio_original = os.getcwd()
+    os.chdir(destino)
+    try:
+        inicio = time.perf_counter()
+        crudos = [pd.read_csv(BytesIO(contenido)).assign(Gestor=gestor) for gestor, contenido in fuentes.items()]
+        antes = enriquecer(pd.concat(crudos, ignore_index=True))
+        antes = antes.sort_values("HoraPeru", kind="stable", ignore_index=True)
+        t_antes = time.perf_counter() - inicio
+
+        _reiniciar_estado()
+        inicio = time.perf_counter()
+        despues = fetch_data.get_alarmas()
+        t_despues = time.perf_counter() - inicio
+    finally:
+        os.chdir(directorio_original)
+        servidor.shutdown()
+
+    verificar_orden_pivot(antes, despues)
+    resultados.append({"tamano": nombre_tamano, "objeto": "snapshot",
+                       "antes_mb": memoria_mb(antes), "despues_mb": memoria_mb(despues),
+                       "antes_s": t_antes, "despues_s": t_despues})
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="100k", help=f"Lista separada por comas de {', '.join(TAMANOS)}")
+    parser.add_argument("--directorio", default=os.path.join(tempfile.gettempdir(), "adce_bench"))
+    args = parser.parse_args()
+
+    filas = []
+    for nombre_tamano in args.tamanos.split(","):
+        filas.extend(comparar(nombre_tamano, TAMANOS[nombre_tamano], args.directorio))
+    tabla = pd.DataFrame(filas)
+    tabla["reduccion"] = (tabla["antes_mb"] / tabla["despues_mb"]).map("{:.1f}x".format)
+    print(tabla.round(3).to_string(index=False))
+    print("✅ tabla dinámica en el mismo orden que con llaves de texto")
+
+
+if __name__ == "__main__":
+    main()
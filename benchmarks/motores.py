@@ -0,0 +1,89 @@
+"""Motor pandas vs DuckDB (ADCE_MOTOR) para filtros, tabla dinámica y top de OLT, con verificación de igualdad.
+
+Recorre combinaciones de filtros del sidebar (rango, gestor, TipoFinal y
+strAckUserName) sobre el snapshot sintético. En cada una mide el camino pandas
+(filtrar_rango_fechas + filtrar_gestor_y_tipo, conteo_por_codigos y el cubo de
+conteos) contra ConsultasDuckDB y verifica que los resultados sean idénticos.
+
+Uso (desde la raíz del repo, con duckdb instalado):
+    python -m benchmarks.motores --tamano 1M
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.flapping import _snapshot
+from benchmarks.pipeline import TAMANOS
+from scripts.columnar import HILOS_DUCKDB, ConsultasDuckDB, motor_disponible
+from scripts.consultas import filtrar_gestor_y_tipo, filtrar_rango_fechas
+from scripts.cubo import CuboConteos
+from scripts.pivot import conteo_por_codigos
+
+
+def _medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def combinaciones(alarmas):
+    """Filtros (rango, gestor, tipo_final, str_name) como los arma el sidebar."""
+    fechas = sorted(alarmas["HoraPeru"].dt.date.unique())
+    rangos = [None, (fechas[0], fechas[-1]), (fechas[-1], fechas[-1])]
+    tipos = tuple(alarmas["TipoFinal"].dropna().unique()[:2])
+    nombres = tuple(alarmas["strAckUserName"].dropna().unique()[:2])
+    for rango in rangos:
+        yield rango, "Ambos", (), ()
+        yield rango, "HUAWEI", (), ()
+        yield rango, "HUAWEI", tipos, ()
+        yield rango, "ZTE", (), ()
+        yield rango, "ZTE", (), nombres
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamano", default="100k", choices=list(TAMANOS))
+    parser.add_argument("--directorio", default=os.path.join(tempfile.gettempdir(), "adce_bench"))
+    args = parser.parse_args()
+    if not motor_disponible("duckdb"):
+        raise SystemExit("duckdb no está instalado (pip install duckdb)")
+
+    alarmas = _snapshot(args.tamano, args.directorio)
+    consultas, t_duckdb = _medir(lambda: ConsultasDuckDB(alarmas))
+    cubo, t_cubo = _medir(lambda: CuboConteos(alarmas))
+    print(f"📏 {len(alarmas)} filas · {HILOS_DUCKDB} hilos · preparación: DuckDB {t_duckdb * 1000:.0f} ms, "
+          f"cubo {t_cubo * 1000:.0f} ms")
+
+    filas = []
+    for rango, gestor, tipos, nombres in combinaciones(alarmas):
+        filtros = (rango, gestor, tipos, nombres)
+        base = alarmas if rango is None else filtrar_rango_fechas(alarmas, *rango)
+        esperado, t_filtro_pandas = _medir(lambda: filtrar_gestor_y_tipo(base, gestor, tipos, nombres))
+        obtenido, t_filtro_duckdb = _medir(lambda: consultas.filtrar(*filtros))
+        pd.testing.assert_frame_equal(obtenido, esperado)
+
+        esperado_pivot, t_pivot_pandas = _medir(lambda: conteo_por_codigos(esperado))
+        obtenido_pivot, t_pivot_duckdb = _medir(lambda: consultas.conteo_pivot(*filtros))
+        pd.testing.assert_frame_equal(obtenido_pivot, esperado_pivot)
+
+        esperado_top, t_top_pandas = _medir(lambda: cubo.conteo_por("DEV", cubo.seleccion(*filtros)))
+        obtenido_top, t_top_duckdb = _medir(lambda: consultas.conteo_por("DEV", *filtros))
+        pd.testing.assert_series_equal(obtenido_top, esperado_top)
+
+        filas.append({
+            "rango": "todo" if rango is None else f"{rango[0]}…{rango[1]}", "gestor": gestor,
+            "tipos": len(tipos) + len(nombres), "filas": len(esperado),
+            "filtro_pandas_ms": t_filtro_pandas * 1000, "filtro_duckdb_ms": t_filtro_duckdb * 1000,
+            "pivot_pandas_ms": t_pivot_pandas * 1000, "pivot_duckdb_ms": t_pivot_duckdb * 1000,
+            "top_pandas_ms": t_top_pandas * 1000, "top_duckdb_ms": t_top_duckdb * 1000,
+        })
+
+    print(pd.DataFrame(filas).round(1).to_string(index=False))
+    print("✅ resultados idénticos en todas las combinaciones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Benchmark por etapas del pipeline de alarmas y del render de app.py, con datos sintéticos.
+
+Para cada tamaño genera los exportes, levanta el servidor local (Sheets + API OLT)
+y mide cada etapa: tiempo, filas/s y pico de memoria. El pico se reporta en dos
+columnas: pico_py_mb (tracemalloc: objetos de Python y arreglos de numpy) y
+pico_arrow_mb (memoria de pyarrow, muestreada con pa.total_allocated_bytes(),
+que tracemalloc no ve: descarga y parseo de las hojas, snapshot en Arrow). Con
+--salida agrega una línea JSON por etapa, con el commit, para comparar entre
+versiones.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.pipeline --tamanos 10k,100k,1M --salida bench.jsonl
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks import servidor_local, sinteticos
+from scripts import fetch_data, olt_api
+from scripts.clientes import CLIENTES_ACTIVOS, CLIENTES_TDP
+from scripts.consultas import filtrar_rango_fechas
+from scripts.cubo import CuboConteos
+from scripts.pivot import conteo_por_codigos, formatear_tabla
+
+TAMANOS = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "5M": 5_000_000}
+CONSULTAS_LOTE = 32
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def _reiniciar_estado():
+    """Olvida descargas, estado incremental y respuestas de la API de corridas anteriores."""
+    fetch_data._cache_descargas.clear()
+    fetch_data._estado_incremental.clear()
+    olt_api._cache_consultas.clear()
+
+
+def etapas(ctx):
+    """Etapas en orden: (nombre, función(ctx) → resultado, filas de entrada)."""
+    def descarga(ctx):
+        _reiniciar_estado()
+        crudos = fetch_data.descargar_fuentes({"Huawei": fetch_data.URL_HUAWEI, "ZTE": fetch_data.URL_ZTE})
+        ctx["crudo"] = pd.concat(crudos.values(), ignore_index=True)
+        return ctx["crudo"]
+
+    def dev2(ctx):
+        ctx["dev2"] = fetch_data.construir_dev2(ctx["crudo"])
+        return ctx["dev2"]
+
+    def indices_clientes(ctx):
+        CLIENTES_ACTIVOS._firma = CLIENTES_TDP._firma = None
+        return CLIENTES_ACTIVOS.indice(), CLIENTES_TDP.indice()
+
+    def cruce_clientes(ctx):
+        return CLIENTES_ACTIVOS.buscar(ctx["dev2"])
+
+    def cruce_tdp(ctx):
+        return CLIENTES_TDP.buscar(ctx["crudo"]["AditionalInfo"])
+
+    def get_alarmas(ctx):
+        _reiniciar_estado()
+        ctx["snapshot"] = fetch_data.get_alarmas(incremental=True)
+        return ctx["snapshot"]
+
+    def get_alarmas_sin_cambios(ctx):
+        return fetch_data.get_alarmas(incremental=True)
+
+    def filtro_fechas(ctx):
+        fin = ctx["snapshot"]["HoraPeru"].iloc[-1].date()
+        ctx["rango"] = (fin, fin)
+        ctx["filtrado"] = filtrar_rango_fechas(ctx["snapshot"], fin, fin)
+        return ctx["filtrado"]
+
+    def cubo(ctx):
+        ctx["cubo"] = CuboConteos(ctx["snapshot"])
+        return ctx["cubo"]
+
+    def pivot(ctx):
+        ctx["tabla"] = formatear_tabla(conteo_por_codigos(ctx["filtrado"]))
+        return ctx["tabla"]
+
+    def top_olt(ctx):
+        # Como app.py: conteo por DEV desde el cubo del snapshot con la selección del sidebar
+        cubo = ctx["cubo"]
+        return cubo.conteo_por("DEV", cubo.seleccion(ctx["rango"])).head(10)
+
+    def exportar_csv(ctx):
+        return ctx["tabla"].to_csv().encode("utf-8")
+
+    def consulta_lote(ctx):
+        olt_api._cache_consultas.clear()
+        peticiones = [olt_api.peticion_huawei(f"OLT_{i}", i % 16, i % 8) for i in range(CONSULTAS_LOTE)]
+        return list(olt_api.consultar_lote(peticiones))
+
+    return [
+        ("descarga_csv", descarga, lambda: ctx["filas"]),
+        ("dev2", dev2, lambda: len(ctx["crudo"])),
+        ("indices_clientes", indices_clientes, lambda: 0),
+        ("cruce_clientes_activos", cruce_clientes, lambda: len(ctx["crudo"])),
+        ("cruce_clientes_tdp", cruce_tdp, lambda: len(ctx["crudo"])),
+        ("get_alarmas", get_alarmas, lambda: ctx["filas"]),
+        ("get_alarmas_sin_cambios", get_alarmas_sin_cambios, lambda: ctx["filas"]),
+        ("filtro_fechas", filtro_fechas, lambda: len(ctx["snapshot"])),
+        ("pivot", pivot, lambda: len(ctx["filtrado"])),
+        ("cubo", cubo, lambda: len(ctx["snapshot"])),
+        ("top_olt", top_olt, lambda: len(ctx["cubo"])),
+        ("exportar_csv", exportar_csv, lambda: len(ctx["tabla"])),
+        ("consulta_lote", consulta_lote, lambda: CONSULTAS_LOTE),
+    ]
+
+
+class PicoArrow:
+    """Muestrea pa.total_allocated_bytes() en un hilo y guarda el máximo sobre el valor inicial (MB)."""
+
+    def __init__(self, intervalo=0.002):
+        self.intervalo = intervalo
+        self.pico_mb = 0.0
+        self._terminado = threading.Event()
+
+    def _muestrear(self):
+        while True:
+            self.pico_mb = max(self.pico_mb, (pa.total_allocated_bytes() - self._base) / 2**20)
+            if self._terminado.wait(self.intervalo):
+                return
+
+    def __enter__(self):
+        self._base = pa.total_allocated_bytes()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *excepcion):
+        self._terminado.set()
+        self._hilo.join()
+
+
+def medir_etapa(funcion, ctx, con_memoria):
+    """Tiempo de una ejecución y, si se pide, picos de memoria (Python, Arrow) de una segunda ejecución."""
+    inicio = time.perf_counter()
+    funcion(ctx)
+    segundos = time.perf_counter() - inicio
+
+    pico_py_mb = pico_arrow_mb = None
+    if con_memoria:
+        tracemalloc.start()
+        with PicoArrow() as arrow:
+            funcion(ctx)
+        pico_arrow_mb = arrow.pico_mb
+        pico_py_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return segundos, pico_py_mb, pico_arrow_mb
+
+
+def correr(nombre_tamano, filas, directorio, con_memoria=True, latencia_api=0.05):
+    """Genera los datos de un tamaño, corre todas las etapas y devuelve sus mediciones."""
+    destino = os.path.join(directorio, nombre_tamano)
+    if not os.path.exists(os.path.join(destino, sinteticos.ARCHIVO_HUAWEI)):
+        sinteticos.generar(filas, destino)
+
+    servidor, base = servidor_local.iniciar_en_segundo_plano(destino, latencia_api=latencia_api)
+    servidor_local.apuntar_a(base)
+    directorio_original = os.getcwd()
+    os.chdir(destino)
+    try:
+        ctx = {"filas": filas}
+        resultados = []
+        for nombre, funcion, filas_entrada in etapas(ctx):
+            segundos, pico_py_mb, pico_arrow_mb = medir_etapa(funcion, ctx, con_memoria)
+            n = filas_entrada()
+            resultados.append({
+                "tamano": nombre_tamano,
+                "etapa": nombre,
+                "segundos": round(segundos, 4),
+                "filas": n,
+                "filas_por_s": round(n / segundos) if segundos and n else None,
+                "pico_py_mb": round(pico_py_mb, 1) if pico_py_mb is not None else None,
+                "pico_arrow_mb": round(pico_arrow_mb, 1) if pico_arrow_mb is not None else None,
+            })
+        return resultados
+    finally:
+        os.chdir(directorio_original)
+        servidor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="10k,100k", help=f"Lista separada por comas de {', '.join(TAMANOS)}")
+    parser.add_argument("--directorio", default=os.path.join(tempfile.gettempdir(), "adce_bench"))
+    parser.add_argument("--salida", help="Archivo JSON lines al que se agregan los resultados")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria")
+    parser.add_argument("--latencia-api", type=float, default=0.05)
+    args = parser.parse_args()
+
+    commit = _commit()
+    marca = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for nombre_tamano in args.tamanos.split(","):
+        resultados = correr(nombre_tamano, TAMANOS[nombre_tamano], args.directorio,
+                            con_memoria=not args.sin_memoria, latencia_api=args.latencia_api)
+        print(f"\n📏 {nombre_tamano} filas (commit {commit})")
+        print(pd.DataFrame(resultados).drop(columns="tamano").to_string(index=False))
+        if args.salida:
+            with open(args.salida, "a", encoding="utf-8") as salida:
+                for fila in resultados:
+                    salida.write(json.dumps({"commit": commit, "fecha": marca, **fila}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
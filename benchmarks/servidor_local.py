@@ -0,0 +1,120 @@
+"""Servidor HTTP local que reemplaza a Google Sheets (CSV publicados) y a la API OLT de ngrok.
+
+- GET /huawei.csv, /zte.csv: sirve los CSV del directorio con ETag y Last-Modified
+  (responde 304 a peticiones condicionales si el archivo no cambió).
+- GET /consulta, /pruebazte, /consulta_serial: respuestas JSON con la forma de la API
+  real, con una latencia configurable para simular el túnel.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.servidor_local --directorio bench_data --puerto 8765
+"""
+import argparse
+import email.utils
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _respuesta_olt(ruta, params):
+    rx = f"{random.uniform(-32, -15):.2f} dBm"
+    if ruta == "/consulta":
+        return [{"ALIAS": f"CLIENTE_{i}", "LSTDOWNTIME": "2025-11-11 10:00:00", "LSTUPTIME": "2025-11-11 10:05:00",
+                 "ONTID": i, "OperState": random.choice(["up", "down"]), "RxPower": rx} for i in range(4)]
+    if ruta == "/pruebazte":
+        return [{"ONUID": params.get("ponid", ""), "OperState": random.choice(["working", "LOS"]),
+                 "AUTHINFO": "SN", "LASTOFFTIME": "2025-11-11 09:00:00"}]
+    serial = params.get("serial", "")
+    return {
+        "serial_number": serial,
+        "datos_ont": {"alias": f"CLIENTE_{serial}", "ontid": 3, "lineprof": "FTTH", "dev": "OLT_BENCH",
+                      "fn": 0, "sn": 1, "pn": 2, "dev_completo": "OLT_BENCH 0/1/2"},
+        "parametros_opticos": {"rx_power": rx, "tx_power": "2.10 dBm", "bias_current": "10 mA",
+                               "temperature": "45 C", "voltage": "3.3 V", "ranging_distance": "1200 m"},
+    }
+
+
+def crear_servidor(directorio, puerto=0, latencia_api=0.05):
+    """Crea (sin arrancar) el servidor local; devuelve (servidor, url_base)."""
+
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _enviar(self, estado, cuerpo=b"", tipo="application/json", cabeceras=None):
+            self.send_response(estado)
+            for nombre, valor in (cabeceras or {}).items():
+                self.send_header(nombre, valor)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.endswith(".csv"):
+                return self._csv(url.path.lstrip("/"))
+            if url.path in ("/consulta", "/pruebazte", "/consulta_serial"):
+                time.sleep(latencia_api)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                return self._enviar(200, json.dumps(_respuesta_olt(url.path, params)).encode())
+            self._enviar(404, b"{}")
+
+        def _csv(self, nombre):
+            ruta = os.path.join(directorio, os.path.basename(nombre))
+            if not os.path.exists(ruta):
+                return self._enviar(404, b"")
+            info = os.stat(ruta)
+            etag = '"' + hashlib.md5(f"{info.st_mtime_ns}-{info.st_size}".encode()).hexdigest() + '"'
+            modificado = email.utils.formatdate(info.st_mtime, usegmt=True)
+            cabeceras = {"ETag": etag, "Last-Modified": modificado}
+            if self.headers.get("If-None-Match") == etag:
+                return self._enviar(304, cabeceras=cabeceras)
+            with open(ruta, "rb") as archivo:
+                cuerpo = archivo.read()
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                cuerpo = gzip.compress(cuerpo, compresslevel=1)
+                cabeceras["Content-Encoding"] = "gzip"
+            self._enviar(200, cuerpo, tipo="text/csv", cabeceras=cabeceras)
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), Manejador)
+    servidor.daemon_threads = True
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def iniciar_en_segundo_plano(directorio, latencia_api=0.05):
+    """Arranca el servidor en un hilo daemon; devuelve (servidor, url_base)."""
+    servidor, base = crear_servidor(directorio, latencia_api=latencia_api)
+    threading.Thread(target=servidor.serve_forever, name="servidor-local", daemon=True).start()
+    return servidor, base
+
+
+def apuntar_a(base):
+    """Redirige las URLs de fetch_data y olt_api al servidor local (mismo proceso)."""
+    from scripts import fetch_data, olt_api
+
+    fetch_data.URL_HUAWEI = f"{base}/huawei.csv"
+    fetch_data.URL_ZTE = f"{base}/zte.csv"
+    olt_api.NGROK_BASE_URL = base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--directorio", default="bench_data")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia-api", type=float, default=0.05)
+    args = parser.parse_args()
+    servidor, base = crear_servidor(args.directorio, args.puerto, args.latencia_api)
+    print(f"🌐 Sirviendo {args.directorio} en {base}")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Generador de exportes sintéticos de alarmas Huawei/ZTE y de los parquet de clientes.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.sinteticos --filas 100000 --destino /tmp/adce_bench
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.fetch_data import MAPEO_ALARMAS
+
+# Proporción de puertos / suscripciones de las alarmas que existen en los parquet de clientes
+COBERTURA_CLIENTES = 0.7
+COBERTURA_TDP = 0.6
+# Proporción de filas que son ZTE
+PROPORCION_ZTE = 0.35
+
+ARCHIVO_HUAWEI = "huawei.csv"
+ARCHIVO_ZTE = "zte.csv"
+
+
+def _olts(cantidad, rng):
+    modelos = ["MA5800", "MA5600T", "C300", "C600"]
+    sedes = ["LIMA", "CUSCO", "AREQUIPA", "PIURA", "TRUJILLO", "CHICLAYO", "HUARAZ", "PUNO", "TACNA", "ICA"]
+    return np.array(
+        [f"OLT_{rng.choice(modelos)}_{rng.choice(sedes)}_{i}" for i in range(cantidad)], dtype=object
+    )
+
+
+def _alarmas(filas, gestor, olts, inicio_serial, fin, rng):
+    """Filas con las columnas que usa el dashboard, en el formato de las hojas publicadas."""
+    hora = fin - pd.to_timedelta(rng.integers(0, 3 * 86400, filas), unit="s")
+    df = pd.DataFrame({
+        "SerialNo": np.arange(inicio_serial, inicio_serial + filas),
+        "DEV": rng.choice(olts, filas),
+        "FN": 0,
+        "SN": rng.integers(0, 18, filas).astype(float),
+        "PN": rng.integers(0, 16, filas).astype(float),
+        "FaultID": rng.choice(list(MAPEO_ALARMAS) + [0], filas,
+                              p=[0.05, 0.05, 0.3, 0.2, 0.2, 0.1, 0.1]),
+        "AditionalInfo": rng.integers(10_000_000, 10_000_000 + max(filas // 3, 10), filas).astype(str),
+        "HoraPeru": hora.strftime("%d/%m/%Y %H:%M:%S"),
+        "Hour": hora.hour,
+        "HoraProceso": fin.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    if gestor == "Huawei":
+        df["TipoFinal"] = rng.choice(["PON", "ONT", "TARJETA", "NE"], filas)
+    else:
+        df["strAckUserName"] = rng.choice(["LOS", "DYING GASP", "LOF"], filas)
+        df["DID"] = rng.choice([f"10.{i // 250}.{i % 250}.1" for i in range(len(olts))], filas)
+        df["ONTID"] = rng.integers(1, 128, filas)
+    # Algunos PN vacíos, como en las hojas reales
+    df.loc[rng.random(filas) < 0.005, "PN"] = np.nan
+    return df
+
+
+def generar(filas, destino, semilla=0):
+    """Escribe huawei.csv, zte.csv, clientes_activos.parquet y clientes_TDP.parquet en `destino`."""
+    os.makedirs(destino, exist_ok=True)
+    rng = np.random.default_rng(semilla)
+    olts = _olts(max(filas // 2000, 20), rng)
+    fin = pd.Timestamp("2025-11-11 23:59:00")
+
+    filas_zte = int(filas * PROPORCION_ZTE)
+    huawei = _alarmas(filas - filas_zte, "Huawei", olts, 1, fin, rng)
+    zte = _alarmas(filas_zte, "ZTE", olts, 10**9, fin, rng)
+    huawei.to_csv(os.path.join(destino, ARCHIVO_HUAWEI), index=False)
+    zte.to_csv(os.path.join(destino, ARCHIVO_ZTE), index=False)
+
+    # Clientes por puerto: una parte de los puertos con alarmas más puertos sin alarmas
+    alarmas = pd.concat([huawei, zte])
+    puertos = (
+        alarmas["DEV"] + "-0-" + alarmas["SN"].astype(int).astype(str) + "-"
+        + alarmas["PN"].fillna(0).astype(int).astype(str)
+    ).unique()
+    con_clientes = rng.choice(puertos, int(len(puertos) * COBERTURA_CLIENTES), replace=False)
+    extra = [f"OLT_EXTRA_{i}-0-{i % 18}-{i % 16}" for i in range(len(puertos) // 2)]
+    etiquetas = np.concatenate([con_clientes, np.array(extra, dtype=object)])
+    online = rng.integers(0, 64, len(etiquetas))
+    offline = rng.integers(0, 16, len(etiquetas))
+    pd.DataFrame({
+        "Etiquetas de fila": etiquetas,
+        "Offline": offline.astype(float),
+        "Online": online.astype(float),
+        "Total general": online + offline,
+    }).to_parquet(os.path.join(destino, "clientes_activos.parquet"), index=False)
+
+    # Clientes TDP: suscripciones con serial del ONT
+    suscripciones = alarmas["AditionalInfo"].unique()
+    con_serial = rng.choice(suscripciones, int(len(suscripciones) * COBERTURA_TDP), replace=False)
+    pd.DataFrame({
+        "SUBSCRIPCION": con_serial.astype(np.int64),
+        "SERIAL NUMBER": [f"HWTC{n:08X}" for n in rng.integers(0, 2**32, len(con_serial))],
+    }).to_parquet(os.path.join(destino, "clientes_TDP.parquet"), index=False)
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--destino", default="bench_data")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    generar(args.filas, args.destino, args.semilla)
+    print(f"✅ Datos sintéticos de {args.filas} filas en {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
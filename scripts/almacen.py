@@ -0,0 +1,140 @@
+import json
+import os
+import re
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+# Archivos de snapshot versionados y puntero al más reciente
+PATRON_SNAPSHOT = "alarmas_v{version:06d}.arrow"
+REGEX_SNAPSHOT = re.compile(r"^alarmas_v(\d+)\.arrow$")
+ARCHIVO_PUNTERO = "ULTIMO"
+
+# Versiones que se conservan en disco (las réplicas pueden seguir leyendo una anterior)
+VERSIONES_CONSERVADAS = 3
+
+
+def _escribir_atomico(ruta, escribir):
+    """Escribe en un temporal del mismo directorio y lo renombra: nadie ve un archivo a medias."""
+    directorio = os.path.dirname(ruta) or "."
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=".tmp_")
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            escribir(archivo)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def versiones(directorio):
+    """Versiones presentes en el directorio, ascendentes."""
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return []
+    return sorted(int(m.group(1)) for m in map(REGEX_SNAPSHOT.match, nombres) if m)
+
+
+def puntero(directorio):
+    """Contenido del puntero (versión, archivo, filas y metadatos del worker); None si aún no hay ninguno."""
+    try:
+        with open(os.path.join(directorio, ARCHIVO_PUNTERO), encoding="utf-8") as archivo:
+            contenido = json.load(archivo)
+    except (FileNotFoundError, ValueError):
+        return None
+    return contenido if isinstance(contenido, dict) and "version" in contenido else None
+
+
+def version_vigente(directorio):
+    """Versión publicada más reciente según el puntero; None si aún no hay ninguna."""
+    contenido = puntero(directorio)
+    return None if contenido is None else contenido["version"]
+
+
+def publicar(df, directorio, metadatos=None, conservar=VERSIONES_CONSERVADAS):
+    """Escribe el DataFrame como Arrow IPC sin comprimir (mapeable) y lo marca como vigente.
+
+    Devuelve la versión publicada. Se conservan las `conservar` más recientes
+    (al menos la publicada) y las viejas se borran; quien ya las tenga mapeadas
+    en memoria las sigue leyendo hasta soltarlas.
+    """
+    if conservar < 1:
+        raise ValueError(f"conservar debe ser al menos 1 (se recibió {conservar})")
+    os.makedirs(directorio, exist_ok=True)
+    existentes = versiones(directorio)
+    version = (existentes[-1] if existentes else 0) + 1
+    nombre = PATRON_SNAPSHOT.format(version=version)
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+
+    def escribir(archivo):
+        with pa.ipc.new_file(archivo, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+
+    _escribir_atomico(os.path.join(directorio, nombre), escribir)
+    puntero = {"version": version, "archivo": nombre, "filas": len(df), **(metadatos or {})}
+    _escribir_atomico(
+        os.path.join(directorio, ARCHIVO_PUNTERO),
+        lambda archivo: archivo.write(json.dumps(puntero, default=str).encode("utf-8")),
+    )
+
+    for vieja in existentes[:max(len(existentes) + 1 - conservar, 0)]:
+        try:
+            os.unlink(os.path.join(directorio, PATRON_SNAPSHOT.format(version=vieja)))
+        except OSError:
+            pass
+    return version
+
+
+def leer(directorio, version):
+    """Mapea en memoria la versión pedida y la devuelve como DataFrame.
+
+    Las columnas numéricas, de fecha y de texto quedan sobre el archivo mapeado
+    (el texto como string[pyarrow]), así varias réplicas comparten las mismas
+    páginas del caché del sistema operativo.
+    """
+    ruta = os.path.join(directorio, PATRON_SNAPSHOT.format(version=version))
+    with pa.memory_map(ruta, "r") as fuente:
+        tabla = pa.ipc.open_file(fuente).read_all()
+    return tabla.to_pandas(
+        split_blocks=True,
+        types_mapper={pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}.get,
+    )
+
+
+class LectorSnapshots:
+    """Carga el snapshot vigente del directorio; si no cambió devuelve el mismo DataFrame.
+
+    Pensado como función de carga de SnapshotCache: al devolver el mismo objeto
+    se conservan la versión y las estructuras derivadas del snapshot en memoria.
+    `metadatos` es el puntero de la versión cargada: lo que el worker midió al
+    publicarla (segundos, filas, cruce...), ya que la réplica no corre el pipeline.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.version = None
+        self.metadatos = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            contenido = puntero(self.directorio)
+            if contenido is None:
+                raise FileNotFoundError(f"No hay snapshots publicados en {self.directorio}")
+            version = contenido["version"]
+            if version != self.version:
+                self._data = leer(self.directorio, version)
+                self.version = version
+                self.metadatos = contenido
+            return self._data
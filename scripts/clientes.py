@@ -0,0 +1,98 @@
+import os
+import threading
+
+import pandas as pd
+
+
+class TablaReferencia:
+    """Tabla de clientes (parquet) precargada como índice llave → valor.
+
+    Solo se leen las columnas de llave y valor, y el índice se reconstruye
+    únicamente cuando cambia el mtime o el tamaño del archivo. Si una llave
+    aparece repetida en el parquet se conserva la primera ocurrencia.
+    """
+
+    def __init__(self, ruta, llaves, valor, normalizar=None):
+        self.ruta = ruta
+        self.llaves = llaves          # nombres posibles de la columna llave en el parquet
+        self.valor = valor
+        self.normalizar = normalizar  # transformación de la llave (p. ej. astype(str))
+        self._indice = None
+        self._firma = None
+        self.version = 0
+        self.error = None
+        self._lock = threading.Lock()
+
+    def _firma_archivo(self):
+        try:
+            info = os.stat(self.ruta)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _leer(self):
+        ultimo_error = None
+        for llave in self.llaves:
+            try:
+                tabla = pd.read_parquet(self.ruta, columns=[llave, self.valor])
+                break
+            except Exception as e:
+                ultimo_error = e
+        else:
+            raise ultimo_error
+
+        claves = tabla[llave]
+        if self.normalizar is not None:
+            claves = self.normalizar(claves)
+        indice = pd.Series(tabla[self.valor].to_numpy(), index=pd.Index(claves, name=llave), name=self.valor)
+        return indice[~indice.index.duplicated(keep="first")]
+
+    def indice(self):
+        """Índice vigente (Series llave → valor), recargado si el archivo cambió."""
+        firma = self._firma_archivo()
+        with self._lock:
+            if firma != self._firma:
+                self._firma = firma
+                self.version += 1
+                try:
+                    if firma is None:
+                        raise FileNotFoundError(self.ruta)
+                    self._indice = self._leer()
+                    self.error = None
+                except Exception as e:
+                    print(f"⚠️ No se pudo cargar {self.ruta}: {e}")
+                    self._indice = None
+                    self.error = str(e)
+            return self._indice
+
+    def buscar(self, claves):
+        """Valor para cada llave (NaN si no existe); None si la tabla no está disponible."""
+        indice = self.indice()
+        if indice is None:
+            return None
+        if self.normalizar is not None:
+            claves = self.normalizar(claves)
+        return claves.map(indice)
+
+    def coincidencias(self, claves):
+        """Cantidad de llaves presentes en la tabla."""
+        indice = self.indice()
+        if indice is None:
+            return 0
+        if self.normalizar is not None:
+            claves = self.normalizar(claves)
+        return int(claves.isin(indice.index).sum())
+
+
+CLIENTES_ACTIVOS = TablaReferencia(
+    "clientes_activos.parquet",
+    llaves=("Etiquetas de fila", "DEV_2"),
+    valor="Total general",
+)
+
+CLIENTES_TDP = TablaReferencia(
+    "clientes_TDP.parquet",
+    llaves=("SUBSCRIPCION",),
+    valor="SERIAL NUMBER",
+    normalizar=lambda claves: claves.astype(str),
+)
@@ -0,0 +1,151 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import duckdb
+except ImportError:  # sin duckdb las consultas siguen en pandas
+    duckdb = None
+
+from scripts.pivot import COLUMNA_PIVOT, INDICE_PIVOT, VALOR_PIVOT, conteo_por_codigos
+
+# Hilos de DuckDB por consulta (todos los núcleos)
+HILOS_DUCKDB = os.cpu_count() or 1
+
+# Combinaciones de filtros cuyas posiciones se recuerdan por snapshot
+MAX_FILTROS_GUARDADOS = 32
+
+
+def motor_disponible(nombre):
+    """True si el motor se puede usar en este entorno (pandas siempre)."""
+    return nombre == "pandas" or (nombre == "duckdb" and duckdb is not None)
+
+
+def _parametro(valor):
+    """Escalares de numpy/pandas → tipos de Python que acepta DuckDB como parámetro."""
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def _con_tipos_de(resultado, df):
+    """Devuelve las columnas del resultado con el dtype que tienen en el snapshot."""
+    return pd.DataFrame({col: resultado[col].astype(df[col].dtype) for col in resultado.columns})
+
+
+class ConsultasDuckDB:
+    """Filtros del sidebar, tabla dinámica y conteo por dimensión como consultas de DuckDB.
+
+    Se construye una vez por snapshot: el DataFrame pasa a una tabla Arrow (las
+    columnas numéricas sin copiar) con el número de fila, que DuckDB consulta
+    en paralelo sin materializar el frame filtrado. Cada consulta devuelve
+    posiciones o agregados que se terminan de armar en pandas, así los
+    resultados son los mismos que los del camino pandas (mismos dtypes y orden).
+    Cada consulta abre su propio cursor sobre una conexión compartida.
+    Las posiciones de cada combinación de filtros se guardan (LRU) y se
+    comparten entre sesiones.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        tabla = tabla.append_column("_fila", pa.array(np.arange(len(df), dtype=np.int64)))
+        self._tabla = tabla
+        self._con = duckdb.connect(config={"threads": HILOS_DUCKDB})
+        self._filtradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _cursor(self):
+        # Un cursor por consulta: la conexión no se comparte entre sesiones concurrentes y
+        # Streamlit corre cada rerun en un hilo nuevo, así que guardarlos por hilo solo acumula
+        # cursores de hilos muertos. La tabla se registra en cada cursor (vista por cursor, sin copia)
+        with self._con.cursor() as cursor:
+            cursor.register("alarmas", self._tabla)
+            yield cursor
+
+    def _donde(self, rango=None, gestor="Ambos", tipo_final=(), str_name=()):
+        """Cláusula WHERE y parámetros con los mismos criterios que filtrar_rango_fechas y filtrar_gestor_y_tipo."""
+        condiciones, parametros = ["TRUE"], []
+        if rango is not None and "HoraPeru" in self.df.columns:
+            inicio, fin = rango
+            condiciones.append("HoraPeru >= ? AND HoraPeru < ?")
+            parametros += [pd.Timestamp(inicio).to_pydatetime(),
+                           (pd.Timestamp(fin) + pd.Timedelta(days=1)).to_pydatetime()]
+        if gestor.lower() in ("huawei", "zte"):
+            condiciones.append("lower(Gestor) = ?")
+            parametros.append(gestor.lower())
+        for col, valores in (("TipoFinal", tipo_final), ("strAckUserName", str_name)):
+            if valores and col in self.df.columns:
+                condiciones.append(f'"{col}" IN ({", ".join("?" * len(valores))})')
+                parametros += [_parametro(valor) for valor in valores]
+        return " AND ".join(condiciones), parametros
+
+    def posiciones_filtradas(self, rango=None, gestor="Ambos", tipo_final=(), str_name=()):
+        """Posiciones (iloc, ascendentes) de las filas que pasan los filtros."""
+        clave = (rango, gestor, tuple(sorted(tipo_final)), tuple(sorted(str_name)))
+        with self._lock:
+            posiciones = self._filtradas.get(clave)
+            if posiciones is not None:
+                self._filtradas.move_to_end(clave)
+                return posiciones
+
+        donde, parametros = self._donde(rango, gestor, tipo_final, str_name)
+        with self._cursor() as cursor:
+            resultado = cursor.execute(
+                f"SELECT _fila FROM alarmas WHERE {donde} ORDER BY _fila", parametros
+            ).fetchnumpy()
+        posiciones = np.asarray(resultado["_fila"], dtype=np.intp)
+
+        with self._lock:
+            self._filtradas[clave] = posiciones
+            while len(self._filtradas) > MAX_FILTROS_GUARDADOS:
+                self._filtradas.popitem(last=False)
+        return posiciones
+
+    def filtrar(self, rango=None, gestor="Ambos", tipo_final=(), str_name=()):
+        """Mismo DataFrame que filtrar_rango_fechas + filtrar_gestor_y_tipo."""
+        posiciones = self.posiciones_filtradas(rango, gestor, tipo_final, str_name)
+        if len(posiciones) and posiciones[-1] - posiciones[0] + 1 == len(posiciones):
+            # Filas contiguas (solo rango de fechas): slice sin copiar, como filtrar_rango_fechas
+            return self.df.iloc[posiciones[0]:posiciones[-1] + 1]
+        return self.df.iloc[posiciones]
+
+    def conteo_pivot(self, rango=None, gestor="Ambos", tipo_final=(), str_name=()):
+        """Mismo resultado que conteo_por_codigos(df filtrado): DuckDB agrupa y pandas arma la tabla."""
+        # Se agrupan también las llaves nulas: conteo_por_codigos las descarta, pero las necesita
+        # para ordenar los niveles igual que pivot_table
+        claves = INDICE_PIVOT + [COLUMNA_PIVOT]
+        donde, parametros = self._donde(rango, gestor, tipo_final, str_name)
+        columnas = ", ".join(f'"{col}"' for col in claves)
+        with self._cursor() as cursor:
+            agregado = cursor.execute(
+                f'SELECT {columnas}, count("{VALOR_PIVOT}") AS conteo FROM alarmas '
+                f"WHERE {donde} GROUP BY {columnas}",
+                parametros,
+            ).fetch_arrow_table().to_pandas()
+        conteos = agregado.pop("conteo").to_numpy(dtype=np.int64)
+        return conteo_por_codigos(_con_tipos_de(agregado, self.df), conteos=conteos)
+
+    def conteo_por(self, dim, rango=None, gestor="Ambos", tipo_final=(), str_name=()):
+        """Alarmas por valor no nulo de `dim`, de mayor a menor (mismo resultado que CuboConteos.conteo_por)."""
+        donde, parametros = self._donde(rango, gestor, tipo_final, str_name)
+        with self._cursor() as cursor:
+            resultado = cursor.execute(
+                f'SELECT "{dim}" AS valor, count(*) AS cantidad FROM alarmas '
+                f'WHERE {donde} AND "{dim}" IS NOT NULL GROUP BY "{dim}"',
+                parametros,
+            ).df()
+        valores = resultado["valor"].astype(self.df[dim].dtype)
+        codigos, niveles = pd.factorize(valores, sort=True)
+        cantidades = np.zeros(len(niveles), dtype=np.int64)
+        cantidades[codigos] = resultado["cantidad"].to_numpy(dtype=np.int64)
+        serie = pd.Series(cantidades, index=pd.Index(niveles), name="Cantidad")
+        return serie.sort_values(ascending=False, kind="stable")
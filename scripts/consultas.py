@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+
+def filtrar_rango_fechas(df, inicio, fin, columna="HoraPeru"):
+    """Filas con fecha entre `inicio` y `fin` (inclusive, por día).
+
+    Requiere que `columna` esté ordenada ascendentemente (el snapshot lo está),
+    así el rango se resuelve con dos búsquedas binarias y un slice sin copiar.
+    """
+    valores = df[columna].to_numpy()
+    desde = np.searchsorted(valores, np.datetime64(pd.Timestamp(inicio)), side="left")
+    hasta = np.searchsorted(valores, np.datetime64(pd.Timestamp(fin) + pd.Timedelta(days=1)), side="left")
+    return df.iloc[desde:hasta]
+
+
+class IndiceMultiple:
+    """Índice por varias columnas: posiciones de las filas con una combinación de valores.
+
+    Se construye una vez por snapshot. Cada columna se factoriza, las filas se
+    ordenan por el código combinado y cada búsqueda se resuelve con get_loc por
+    columna más dos búsquedas binarias, sin máscaras sobre todo el DataFrame.
+    Las filas con algún valor nulo en las columnas no se indexan.
+    """
+
+    def __init__(self, df, columnas):
+        self.columnas = list(columnas)
+        validas = np.ones(len(df), dtype=bool)
+        for col in self.columnas:
+            validas &= df[col].notna().to_numpy()
+        posiciones = np.flatnonzero(validas)
+
+        codigos, self._valores = [], []
+        for col in self.columnas:
+            codigo, unicos = pd.factorize(df[col][validas])
+            codigos.append(codigo)
+            self._valores.append(pd.Index(unicos))
+        self._tamanos = [len(valores) for valores in self._valores]
+
+        if np.prod(self._tamanos, dtype=float) >= 2**62:
+            # Demasiadas combinaciones para un código int64: diccionario de grupos
+            self._grupos = df.iloc[posiciones].groupby(self.columnas, sort=False).indices
+            self._grupos = {clave: posiciones[pos] for clave, pos in self._grupos.items()}
+            return
+
+        self._grupos = None
+        combinado = np.zeros(len(posiciones), dtype=np.int64)
+        for codigo, tamano in zip(codigos, self._tamanos):
+            combinado = combinado * tamano + codigo
+        orden = np.argsort(combinado, kind="stable")
+        self._codigos = combinado[orden]
+        self._posiciones = posiciones[orden]
+
+    def posiciones(self, *valores):
+        """Posiciones (iloc, ascendentes) de las filas con esos valores; vacío si no hay."""
+        if self._grupos is not None:
+            return self._grupos.get(tuple(valores), np.array([], dtype=np.intp))
+
+        codigo = 0
+        for valor, indice, tamano in zip(valores, self._valores, self._tamanos):
+            try:
+                codigo = codigo * tamano + indice.get_loc(valor)
+            except (KeyError, TypeError):
+                return np.array([], dtype=np.intp)
+        desde = np.searchsorted(self._codigos, codigo, side="left")
+        hasta = np.searchsorted(self._codigos, codigo, side="right")
+        return self._posiciones[desde:hasta]
+
+
+def filtrar_gestor_y_tipo(df, gestor, tipo_final=(), str_name=()):
+    """Aplica los filtros de gestor y TipoFinal/strAckUserName del sidebar."""
+    if gestor.lower() in ("huawei", "zte"):
+        df = df[df["Gestor"].str.lower() == gestor.lower()]
+    if tipo_final and "TipoFinal" in df.columns:
+        df = df[df["TipoFinal"].isin(tipo_final)]
+    if str_name and "strAckUserName" in df.columns:
+        df = df[df["strAckUserName"].isin(str_name)]
+    return df
+
+
+# --- 🔹 Índice de seriales (SerialNumber_TDP) y suscripciones (AditionalInfo) ---
+COLUMNAS_SERIAL = ["SerialNumber_TDP", "AditionalInfo"]
+VALORES_VACIOS = {"", "NAN", "NONE", "<NA>"}
+MIN_PREFIJO = 4
+MIN_APROXIMADA = 6
+MAX_CLAVES = 20
+
+
+def _normalizar(texto):
+    return str(texto).strip().upper()
+
+
+def _variantes(texto, alfabeto):
+    """Textos a una edición de `texto`: borrado, transposición, reemplazo o inserción."""
+    cortes = [(texto[:i], texto[i:]) for i in range(len(texto) + 1)]
+    variantes = {a + b[1:] for a, b in cortes if b}
+    variantes |= {a + b[1] + b[0] + b[2:] for a, b in cortes if len(b) > 1}
+    variantes |= {a + c + b[1:] for a, b in cortes if b for c in alfabeto}
+    variantes |= {a + c + b for a, b in cortes for c in alfabeto}
+    variantes.discard(texto)
+    return variantes
+
+
+class IndiceSeriales:
+    """Filas del snapshot por serial del ONT o suscripción, con búsqueda exacta, por prefijo y con un error de tipeo.
+
+    Se construye una vez por snapshot: los valores (normalizados a mayúsculas)
+    quedan en un arreglo ordenado y las posiciones de sus filas agrupadas por
+    valor. El prefijo es un rango de dos búsquedas binarias; la búsqueda
+    aproximada genera las variantes a una edición del texto (con los caracteres
+    que aparecen en el índice) y las busca todas juntas en el arreglo ordenado.
+    """
+
+    def __init__(self, df, columnas=COLUMNAS_SERIAL):
+        normalizados, filas, desplazamiento = [], [], 0
+        for col in columnas:
+            if col not in df.columns:
+                continue
+            codigos, unicos = pd.factorize(df[col])
+            valores = pd.Series(unicos, dtype="string[pyarrow]").str.strip().str.upper()
+            validos = (valores.notna() & ~valores.isin(VALORES_VACIOS)).to_numpy()
+            utiles = (codigos >= 0) & np.append(validos, False)[codigos]
+            normalizados.append(valores)
+            filas.append((codigos[utiles] + desplazamiento, np.flatnonzero(utiles)))
+            desplazamiento += len(valores)
+
+        self.claves = np.array([], dtype=object)
+        self._inicios = np.zeros(1, dtype=np.intp)
+        self._posiciones = np.array([], dtype=np.intp)
+        self.alfabeto = ""
+        if not filas:
+            return
+
+        # Códigos de todas las columnas sobre los valores normalizados
+        global_, claves = pd.factorize(pd.concat(normalizados, ignore_index=True))
+        codigo = global_[np.concatenate([c for c, _ in filas])]
+        posiciones = np.concatenate([p for _, p in filas])
+
+        # Solo quedan las claves con alguna fila válida, en orden alfabético
+        usadas = np.flatnonzero(np.bincount(codigo, minlength=len(claves)))
+        usadas = usadas[np.argsort(claves.take(usadas))]
+        nuevo_codigo = np.zeros(len(claves), dtype=np.intp)
+        nuevo_codigo[usadas] = np.arange(len(usadas))
+        codigo = nuevo_codigo[codigo]
+
+        orden = np.argsort(codigo)
+        self.claves = claves.take(usadas).to_numpy(dtype=object)
+        self._inicios = np.searchsorted(codigo[orden], np.arange(len(self.claves) + 1))
+        self._posiciones = posiciones[orden]
+        self.alfabeto = "".join(sorted(set("".join(self.claves))))
+
+    def __len__(self):
+        return len(self.claves)
+
+    def _filas(self, indices):
+        """Posiciones (iloc, ascendentes y sin repetir) de las filas de esas claves."""
+        if len(indices) == 0:
+            return np.array([], dtype=np.intp)
+        partes = [self._posiciones[self._inicios[i]:self._inicios[i + 1]] for i in indices]
+        return np.unique(np.concatenate(partes))
+
+    def _exactas(self, textos):
+        """Índices de las claves que están en `textos`."""
+        textos = np.array(sorted(textos), dtype=object)
+        indices = np.searchsorted(self.claves, textos)
+        encontradas = indices < len(self.claves)
+        encontradas[encontradas] = self.claves[indices[encontradas]] == textos[encontradas]
+        return indices[encontradas]
+
+    def exacta(self, texto):
+        return self._filas(self._exactas([_normalizar(texto)]))
+
+    def prefijo(self, texto, maximo=MAX_CLAVES):
+        """Claves que empiezan con `texto` (hasta `maximo`) y sus filas."""
+        texto = _normalizar(texto)
+        desde = np.searchsorted(self.claves, texto, side="left")
+        hasta = np.searchsorted(self.claves, texto + "\U0010ffff", side="left")
+        indices = np.arange(desde, min(hasta, desde + maximo))
+        return list(self.claves[indices]), self._filas(indices)
+
+    def aproximada(self, texto, maximo=MAX_CLAVES):
+        """Claves a una edición de `texto` (un carácter de más, de menos, cambiado o dos invertidos)."""
+        indices = self._exactas(_variantes(_normalizar(texto), self.alfabeto))[:maximo]
+        return list(self.claves[indices]), self._filas(indices)
+
+    def buscar(self, texto):
+        """Exacta, si no por prefijo y si no aproximada: (modo, claves, posiciones); modo None si no hay."""
+        texto = _normalizar(texto)
+        if not texto or not len(self.claves):
+            return None, [], np.array([], dtype=np.intp)
+        posiciones = self.exacta(texto)
+        if len(posiciones):
+            return "exacta", [texto], posiciones
+        if len(texto) >= MIN_PREFIJO:
+            claves, posiciones = self.prefijo(texto)
+            if claves:
+                return "prefijo", claves, posiciones
+        if len(texto) >= MIN_APROXIMADA:
+            claves, posiciones = self.aproximada(texto)
+            if claves:
+                return "aproximada", claves, posiciones
+        return None, [], np.array([], dtype=np.intp)
+
+
+def resumen_puertos(alarmas):
+    """Una fila por Gestor/DEV/SN/PN de las alarmas encontradas, del puerto con la alarma más reciente al más antiguo."""
+    llave = [c for c in ["Gestor", "DEV", "SN", "PN"] if c in alarmas.columns]
+    if alarmas.empty or not llave:
+        return pd.DataFrame(columns=llave)
+    agregados = {"Alarmas": ("HoraPeru", "size"), "Última alarma": ("HoraPeru", "max")}
+    for col in ["Cliente_puerto", "SerialNumber_TDP", "AditionalInfo", "NAME_ALARM"]:
+        if col in alarmas.columns:
+            agregados[col] = (col, "last")
+    resumen = alarmas.sort_values("HoraPeru", kind="stable").groupby(llave, observed=True, sort=False).agg(**agregados)
+    return resumen.sort_values("Última alarma", ascending=False).reset_index()
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Dimensiones del cubo: día de HoraPeru y columnas de pocos valores distintos
+DIMENSIONES_CUBO = ["Fecha", "Gestor", "DEV", "Hour", "TipoFinal", "strAckUserName"]
+
+
+class CuboConteos:
+    """Cantidad de alarmas por día × Gestor × DEV × Hour × TipoFinal × strAckUserName.
+
+    Se construye una vez por snapshot y solo guarda las celdas con alarmas: un
+    código por dimensión (0 = nulo, i + 1 = niveles[dim][i]) y el conteo. Los
+    filtros del sidebar se resuelven como una máscara sobre las celdas, así el
+    total, las opciones y el top de OLT cuestan según el tamaño del cubo y no
+    según la cantidad de alarmas.
+    """
+
+    def __init__(self, df):
+        self.dimensiones = [
+            dim for dim in DIMENSIONES_CUBO
+            if (dim == "Fecha" and "HoraPeru" in df.columns) or dim in df.columns
+        ]
+        codigos, self.niveles = [], {}
+        for dim in self.dimensiones:
+            valores = df["HoraPeru"].dt.floor("D") if dim == "Fecha" else df[dim]
+            codigo, unicos = pd.factorize(valores, sort=True)
+            codigos.append(codigo.astype(np.int64) + 1)
+            self.niveles[dim] = pd.Index(unicos)
+        tamanos = [len(self.niveles[dim]) + 1 for dim in self.dimensiones]
+
+        if np.prod(tamanos, dtype=float) >= 2**62:
+            # Demasiadas combinaciones para un código int64: conteo por grupos
+            celdas = pd.DataFrame(dict(zip(self.dimensiones, codigos))).value_counts(sort=False)
+            self.codigos = {
+                dim: celdas.index.get_level_values(dim).to_numpy(dtype=np.int32) for dim in self.dimensiones
+            }
+            self.conteos = celdas.to_numpy(dtype=np.int64)
+            return
+
+        combinado = np.zeros(len(df), dtype=np.int64)
+        for codigo, tamano in zip(codigos, tamanos):
+            combinado = combinado * tamano + codigo
+        celdas, conteos = np.unique(combinado, return_counts=True)
+
+        self.codigos = {}
+        for dim, tamano in zip(reversed(self.dimensiones), reversed(tamanos)):
+            celdas, codigo = np.divmod(celdas, tamano)
+            self.codigos[dim] = codigo.astype(np.int32)
+        self.conteos = conteos.astype(np.int64)
+
+    def __len__(self):
+        return len(self.conteos)
+
+    def _codigos_de(self, dim, valores):
+        """Códigos de los valores pedidos que existen en la dimensión."""
+        posiciones = self.niveles[dim].get_indexer(list(valores))
+        return posiciones[posiciones >= 0] + 1
+
+    def seleccion(self, rango=None, gestor="Ambos", tipo_final=(), str_name=()):
+        """Máscara de celdas con los filtros del sidebar (mismos criterios que filtrar_gestor_y_tipo).
+
+        `rango` es (inicio, fin) inclusive por día, como filtrar_rango_fechas.
+        """
+        mascara = np.ones(len(self.conteos), dtype=bool)
+        if rango is not None and "Fecha" in self.codigos:
+            inicio, fin = rango
+            fechas = self.niveles["Fecha"]
+            desde = fechas.searchsorted(pd.Timestamp(inicio), side="left")
+            hasta = fechas.searchsorted(pd.Timestamp(fin) + pd.Timedelta(days=1), side="left")
+            codigo = self.codigos["Fecha"]
+            mascara &= (codigo > desde) & (codigo <= hasta)
+        if gestor.lower() in ("huawei", "zte") and "Gestor" in self.codigos:
+            gestores = [valor for valor in self.niveles["Gestor"] if str(valor).lower() == gestor.lower()]
+            mascara &= np.isin(self.codigos["Gestor"], self._codigos_de("Gestor", gestores))
+        for dim, valores in (("TipoFinal", tipo_final), ("strAckUserName", str_name)):
+            if valores and dim in self.codigos:
+                mascara &= np.isin(self.codigos[dim], self._codigos_de(dim, valores))
+        return mascara
+
+    def total(self, seleccion=None):
+        """Alarmas en las celdas seleccionadas (len del DataFrame filtrado)."""
+        return int(self.conteos.sum() if seleccion is None else self.conteos[seleccion].sum())
+
+    def valores(self, dim, seleccion=None):
+        """Valores no nulos de `dim` presentes en la selección, ordenados."""
+        if dim not in self.codigos:
+            return []
+        codigos = self.codigos[dim] if seleccion is None else self.codigos[dim][seleccion]
+        presentes = np.unique(codigos)
+        return sorted(self.niveles[dim][presentes[presentes > 0] - 1])
+
+    def conteo_por(self, dim, seleccion=None):
+        """Alarmas por valor no nulo de `dim`, de mayor a menor (como groupby(dim).count())."""
+        codigos = self.codigos[dim] if seleccion is None else self.codigos[dim][seleccion]
+        conteos = self.conteos if seleccion is None else self.conteos[seleccion]
+        totales = np.bincount(codigos, weights=conteos, minlength=len(self.niveles[dim]) + 1)[1:]
+        serie = pd.Series(totales.astype(np.int64), index=self.niveles[dim], name="Cantidad")
+        return serie[serie > 0].sort_values(ascending=False, kind="stable")
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Llave de una alarma entre refrescos
+COLUMNAS_HUELLA = ["Gestor", "SerialNo", "DEV_2"]
+
+
+def huellas(df):
+    """Hash uint64 por fila de las columnas de la llave (las categóricas se hashean por categoría)."""
+    columnas = [col for col in COLUMNAS_HUELLA if col in df.columns]
+    if df.empty or not columnas:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+
+
+class DiferenciaSnapshots:
+    """Alarmas nuevas, despejadas y que siguen activas respecto del snapshot anterior.
+
+    Compara los conjuntos de huellas con tablas hash (Index.isin), sin merges
+    fila a fila. Guarda la máscara de nuevas sobre las filas del snapshot
+    nuevo (para resaltarlas) y una copia de las filas despejadas del anterior,
+    que ya no está en el snapshot vigente.
+    """
+
+    def __init__(self, anterior, nuevo, huellas_anteriores=None, huellas_nuevas=None):
+        inicio = time.perf_counter()
+        previas = huellas(anterior) if huellas_anteriores is None else huellas_anteriores
+        actuales = huellas(nuevo) if huellas_nuevas is None else huellas_nuevas
+
+        self.es_nueva = ~pd.Index(actuales).isin(previas)
+        despejada = ~pd.Index(previas).isin(actuales)
+        self.posiciones_nuevas = np.flatnonzero(self.es_nueva)
+        self.filas_despejadas = anterior.iloc[np.flatnonzero(despejada)]
+
+        self.nuevas = len(self.posiciones_nuevas)
+        self.persistentes = len(actuales) - self.nuevas
+        self.despejadas = len(self.filas_despejadas)
+        self.segundos = time.perf_counter() - inicio
+
+    def nuevas_en(self, posiciones):
+        """Posiciones (del snapshot nuevo) de la lista que corresponden a alarmas nuevas."""
+        posiciones = np.asarray(posiciones, dtype=np.intp)
+        return posiciones[self.es_nueva[posiciones]]
+
+
+def preparar_diferencias(anterior, data):
+    """Para SnapshotCache(preparar=...): huellas del snapshot nuevo y su diferencia con el anterior.
+
+    Las huellas quedan guardadas en el snapshot, así el próximo refresco no
+    vuelve a hashear el que pasa a ser el anterior.
+    """
+    actuales = huellas(data)
+    if anterior is None:
+        return {"huellas": actuales}
+    previas = anterior.derivado("huellas", huellas)
+    return {"huellas": actuales, "diferencias": DiferenciaSnapshots(anterior.data, data, previas, actuales)}
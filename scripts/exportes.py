@@ -0,0 +1,78 @@
+import gzip
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+# Formato → (extensión, tipo MIME)
+FORMATOS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV comprimido (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Tope de memoria de los archivos guardados (se descartan los menos usados)
+MAX_BYTES_EXPORTES = 256 * 2**20
+
+
+def serializar(df, formato, index=False):
+    """Bytes del DataFrame en el formato pedido (ver FORMATOS)."""
+    if formato == "Parquet":
+        buffer = BytesIO()
+        df.to_parquet(buffer, index=index)
+        return buffer.getvalue()
+    texto = df.to_csv(index=index).encode("utf-8")
+    if formato == "CSV comprimido (gzip)":
+        return gzip.compress(texto, compresslevel=6)
+    return texto
+
+
+def nombre_archivo(base, formato):
+    return f"{base}.{FORMATOS[formato][0]}"
+
+
+def tamano_legible(n):
+    """1536 → '1.5 KB'; 3_400_000 → '3.2 MB'."""
+    return f"{n / 2**20:.1f} MB" if n >= 2**20 else f"{n / 1024:.1f} KB"
+
+
+class CacheExportes:
+    """Archivos de descarga generados a pedido y compartidos entre sesiones.
+
+    La clave incluye la versión del snapshot y los filtros, así que un archivo
+    se serializa una sola vez por estado y se invalida solo al cambiar de versión.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES_EXPORTES):
+        self.max_bytes = max_bytes
+        self._archivos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.generados = 0
+
+    def obtener(self, clave):
+        """Archivo ya generado para la clave, o None."""
+        with self._lock:
+            archivo = self._archivos.get(clave)
+            if archivo is not None:
+                self._archivos.move_to_end(clave)
+            return archivo
+
+    def generar(self, clave, construir):
+        """Genera el archivo con construir() si no existe y lo guarda."""
+        archivo = self.obtener(clave)
+        if archivo is not None:
+            return archivo
+        archivo = construir()
+        with self._lock:
+            if clave not in self._archivos:
+                self._archivos[clave] = archivo
+                self._bytes += len(archivo)
+                self.generados += 1
+            while self._bytes > self.max_bytes and len(self._archivos) > 1:
+                _, descartado = self._archivos.popitem(last=False)
+                self._bytes -= len(descartado)
+        return archivo
+
+    def estadisticas(self):
+        """Archivos en caché, su tamaño en MB y cuántos se generaron."""
+        return {"archivos": len(self._archivos), "mb": self._bytes / 2**20, "generados": self.generados}
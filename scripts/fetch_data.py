@@ -1,135 +1,702 @@
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute
+import pyarrow.csv as pa_csv
 import requests
-from io import StringIO
-import streamlit as st  
+from io import BytesIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from scripts.clientes import CLIENTES_ACTIVOS, CLIENTES_TDP
+from scripts.metricas import METRICAS
+
 # URLs de tus CSV publicados en Google Sheets
 URL_HUAWEI = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTign5FwsuyQIprayFCmuNAmDexWqKZUYM7tN5i0a5rAU_0UprfZWQUSxX4bJ2m5cIP7YzMiFou75CW/pub?gid=0&single=true&output=csv"
 URL_ZTE = "https://docs.google.com/spreadsheets/d/e/2PACX-1vRY5_ja1U1Ny4KWCefOi6zV1WFDUqQdo8_MyDlGLSSIUYnW3LI3fN7qzT7gKs2xOfu4IrLt7OcVnNzm/pub?gid=0&single=true&output=csv"
 
+# Timeouts (conexión, lectura) en segundos y reintentos ante errores transitorios
+TIMEOUT_DESCARGA = (5, 60)
+REINTENTOS_DESCARGA = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET",),
+)
+
+_sesion = None
+_sesion_lock = threading.Lock()
+# Por URL: validadores HTTP (ETag / Last-Modified) y el último DataFrame bueno
+_cache_descargas = {}
+
+# Formatos de fecha de las hojas exportadas
+FORMATO_HORA_PERU = "%d/%m/%Y %H:%M:%S"
+FORMATO_HORA_PROCESO = "%Y-%m-%d %H:%M:%S"
+
+# Esquema de cada hoja: solo se leen las columnas que usa el dashboard.
+# "entero" se reduce al entero más chico que alcance (nullable si hay vacíos);
+# si la columna trae texto o decimales se deja como viene.
+ESQUEMA_COMUN = {
+    "SerialNo": "entero",
+    "DEV": "categoria",
+    "FN": "entero",
+    "SN": "entero",
+    "PN": "entero",
+    "FaultID": "entero",
+    "NAME_ALARM": "categoria",
+    "AditionalInfo": "texto",
+    "HoraPeru": "fecha",
+    "Hour": "entero",
+    "HoraProceso": "fecha",
+}
+ESQUEMAS = {
+    "Huawei": {**ESQUEMA_COMUN, "TipoFinal": "categoria"},
+    "ZTE": {**ESQUEMA_COMUN, "strAckUserName": "categoria", "DID": "categoria", "ONTID": "entero"},
+}
+FORMATOS_FECHA = {"HoraPeru": FORMATO_HORA_PERU, "HoraProceso": FORMATO_HORA_PROCESO}
+
+# Columnas de baja cardinalidad que el snapshot guarda como category
+COLUMNAS_CATEGORICAS = ["Gestor", "DEV", "DEV_2", "NAME_ALARM", "TipoFinal", "strAckUserName", "DID"]
+
+
+def _obtener_sesion():
+    """Sesión HTTP compartida con pool keep-alive, gzip y reintentos."""
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            sesion = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=REINTENTOS_DESCARGA)
+            sesion.mount("https://", adaptador)
+            sesion.mount("http://", adaptador)
+            sesion.headers.update({"Accept-Encoding": "gzip, deflate"})
+            _sesion = sesion
+    return _sesion
+
+
+def _a_entero(serie):
+    """Columna entera con el tipo más chico posible; con texto o decimales se deja igual."""
+    if pd.api.types.is_integer_dtype(serie) and serie.dtype.kind == "i":
+        return pd.to_numeric(serie, downcast="integer")
+    numeros = pd.to_numeric(serie, errors="coerce")
+    presentes = numeros.dropna()
+    if len(presentes) != serie.notna().sum() or not (presentes % 1 == 0).all():
+        return serie
+    tipo = pd.to_numeric(presentes.astype(np.int64), downcast="integer").dtype if len(presentes) else np.dtype("int8")
+    if len(presentes) < len(numeros):
+        return numeros.astype(tipo.name.capitalize())  # int16 → Int16 (admite <NA>)
+    return numeros.astype(tipo)
+
+
+def _columnas_presentes(contenido, esquema):
+    """Columnas del esquema que figuran en la cabecera del CSV, en el orden del esquema."""
+    fin = contenido.find(b"\n")
+    cabecera = contenido[: fin if fin >= 0 else len(contenido)].decode("utf-8-sig").rstrip("\r")
+    nombres = set(next(csv.reader([cabecera]), []))
+    return [col for col in esquema if col in nombres]
+
+
+def _opciones_arrow(esquema, columnas, enteros_como_float=False):
+    """Tipos declarados para el parser de pyarrow (diccionario, texto, fecha con formato fijo)."""
+    tipos = {}
+    for col in columnas:
+        if esquema[col] == "categoria":
+            tipos[col] = pa.dictionary(pa.int32(), pa.string())
+        elif esquema[col] == "texto":
+            tipos[col] = pa.string()
+        elif esquema[col] == "fecha":
+            tipos[col] = pa.timestamp("ns")
+        elif esquema[col] == "entero" and enteros_como_float:
+            tipos[col] = pa.float64()
+    return pa_csv.ConvertOptions(
+        include_columns=columnas,
+        column_types=tipos,
+        timestamp_parsers=[FORMATOS_FECHA[c] for c in columnas if c in FORMATOS_FECHA],
+        strings_can_be_null=True,
+    )
+
+
+def _tabla_a_pandas(tabla, esquema, columnas):
+    df = tabla.to_pandas()
+    for col in columnas:
+        if esquema[col] == "texto":
+            # Vacíos como NaN (no None), igual que el parser de pandas
+            df[col] = df[col].fillna(np.nan)
+    return df
 
 
-def download_csv(url):
-    """Descarga CSV desde URL pública de Google Sheets."""
+def _leer_csv_arrow(contenido, esquema, columnas):
+    """Parser multihilo de pyarrow: categorías como diccionario y fechas con formato fijo."""
+    tabla = pa_csv.read_csv(BytesIO(contenido), convert_options=_opciones_arrow(esquema, columnas))
+    return _tabla_a_pandas(tabla, esquema, columnas)
+
+
+def _leer_csv_pandas(contenido, esquema, columnas):
+    """Parser C de pandas; las fechas quedan como texto y se convierten en enriquecer()."""
+    return pd.read_csv(BytesIO(contenido), usecols=columnas, dtype=_dtype_pandas(esquema, columnas))
+
+
+def _dtype_pandas(esquema, columnas):
+    dtype = {}
+    for col in columnas:
+        if esquema[col] == "categoria":
+            dtype[col] = "category"
+        elif esquema[col] in ("texto", "fecha"):
+            dtype[col] = str
+    return dtype
+
+
+def _normalizar_enteros(df, esquema, columnas):
+    for col in columnas:
+        if esquema[col] == "entero":
+            df[col] = _a_entero(df[col])
+    return df
+
+
+def leer_csv(contenido, gestor=None):
+    """CSV (bytes) de una hoja → DataFrame tipado según ESQUEMAS[gestor].
+
+    Sin esquema para el gestor se lee todo con inferencia de tipos. Si algún
+    valor no calza con el tipo declarado (p. ej. una fecha en otro formato), se
+    usa el parser de pandas.
+    """
+    esquema = ESQUEMAS.get(gestor)
+    if esquema is None:
+        return pd.read_csv(BytesIO(contenido))
+
+    columnas = _columnas_presentes(contenido, esquema)
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        data = StringIO(response.text)
-        df = pd.read_csv(data)  
-        
-        return df
-    except Exception as e:
-        print(f"Error al descargar {url}: {e}")
-        return pd.DataFrame()
-    
+        df = _leer_csv_arrow(contenido, esquema, columnas)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        df = _leer_csv_pandas(contenido, esquema, columnas)
+    return _normalizar_enteros(df, esquema, columnas)
+
+
+# Tamaño de bloque del parseo en streaming: acota la memoria de texto crudo en vuelo
+TAMANO_BLOQUE_CSV = 1 << 20
+
+
+class EsquemaNoCalza(Exception):
+    """Un valor del CSV no calza con el tipo declarado; ya no se puede re-parsear el flujo."""
+
+
+class _CuerpoHTTP:
+    """Cuerpo de la respuesta como archivo de solo lectura: permite espiar la cabecera y cuenta bytes."""
+
+    closed = False
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._pendiente = b""
+        self.bytes = 0
+
+    def cabecera(self):
+        """Primera línea del CSV sin consumirla."""
+        while b"\n" not in self._pendiente:
+            trozo = self._raw.read(64 * 1024)
+            if not trozo:
+                break
+            self.bytes += len(trozo)
+            self._pendiente += trozo
+        return self._pendiente
+
+    def read(self, n=-1):
+        if self._pendiente:
+            if n is None or n < 0 or n >= len(self._pendiente):
+                trozo, self._pendiente = self._pendiente, b""
+                if n is None or n < 0:
+                    resto = self._raw.read()
+                    self.bytes += len(resto)
+                    trozo += resto
+                return trozo
+            trozo, self._pendiente = self._pendiente[:n], self._pendiente[n:]
+            return trozo
+        trozo = self._raw.read() if n is None or n < 0 else self._raw.read(n)
+        self.bytes += len(trozo)
+        return trozo
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def _filtrar_bloque_arrow(lote):
+    # Sin HoraPeru la alarma no se puede ubicar en el tiempo (igual se recorta del snapshot)
+    if "HoraPeru" in lote.schema.names:
+        lote = lote.filter(pa.compute.is_valid(lote.column("HoraPeru")))
+    return lote
+
+
+def _leer_flujo_arrow(cuerpo, esquema, columnas):
+    """Parsea bloque a bloque mientras llega el cuerpo; solo se guardan los lotes ya tipados."""
+    lotes = []
+    try:
+        lector = pa_csv.open_csv(
+            cuerpo,
+            read_options=pa_csv.ReadOptions(block_size=TAMANO_BLOQUE_CSV),
+            convert_options=_opciones_arrow(esquema, columnas, enteros_como_float=True),
+        )
+        for lote in lector:
+            lotes.append(_filtrar_bloque_arrow(lote))
+        tabla = pa.Table.from_batches(lotes, schema=lector.schema).unify_dictionaries()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise EsquemaNoCalza(str(e)) from e
+    return _tabla_a_pandas(tabla, esquema, columnas)
+
+
+def leer_csv_en_flujo(raw, gestor=None):
+    """Parsea el cuerpo HTTP en bloques a medida que llega, sin armar el texto completo.
+
+    Cada bloque se tipa según ESQUEMAS[gestor] (FN/SN/PN y demás enteros llegan
+    normalizados como números aunque la hoja los escriba como "2" o "2.0") y se
+    descartan las filas sin HoraPeru. Devuelve (df, bytes leídos). Lanza
+    EsquemaNoCalza si un valor no calza con el tipo declarado.
+    """
+    cuerpo = _CuerpoHTTP(raw)
+    esquema = ESQUEMAS.get(gestor)
+    if esquema is None:
+        return pd.read_csv(cuerpo), cuerpo.bytes
+
+    columnas = _columnas_presentes(cuerpo.cabecera(), esquema)
+    df = _leer_flujo_arrow(cuerpo, esquema, columnas)
+    return _normalizar_enteros(df, esquema, columnas), cuerpo.bytes
+
+
+def _categorizar(alarmas):
+    """Pasa a category las columnas de baja cardinalidad, con categorías en orden alfabético.
+
+    El concat entre gestores deja estas columnas en object; las categorías que
+    vienen del parser (orden de aparición) se reordenan para que el orden de las
+    llaves en la tabla dinámica sea el mismo que con texto.
+    """
+    tipos, reordenar = {}, []
+    for col in COLUMNAS_CATEGORICAS:
+        if col not in alarmas.columns:
+            continue
+        tipo = alarmas[col].dtype
+        if not isinstance(tipo, pd.CategoricalDtype):
+            tipos[col] = "category"
+        elif not tipo.categories.is_monotonic_increasing:
+            reordenar.append(col)
+    alarmas = alarmas.astype(tipos, copy=False) if tipos else alarmas.copy(deep=False)
+    for col in reordenar:
+        # astype con el mismo conjunto de categorías no cambia su orden: hay que remapear los códigos
+        alarmas[col] = alarmas[col].cat.reorder_categories(alarmas[col].cat.categories.sort_values())
+    return alarmas
+
+
+def memoria_mb(df):
+    """Memoria del DataFrame en MB, contando el contenido de las columnas object."""
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def _etapa(registro, nombre, **datos):
+    """Etapa medida en el registro del refresco; sin registro solo entrega un dict descartable."""
+    if registro is None:
+        return nullcontext(dict(datos))
+    return registro.etapa(nombre, **datos)
+
+
+def download_csv(url, registro=None, gestor=None):
+    """Descarga CSV desde URL pública de Google Sheets.
+
+    Usa petición condicional: si la hoja no cambió (304) se reutiliza el
+    DataFrame anterior sin transferir ni parsear el CSV. Ante un error se
+    conserva el último dato bueno de esa URL.
+    """
+    previo = _cache_descargas.get(url)
+    headers = {}
+    if previo is not None:
+        if previo["etag"]:
+            headers["If-None-Match"] = previo["etag"]
+        if previo["last_modified"]:
+            headers["If-Modified-Since"] = previo["last_modified"]
+
+    with _etapa(registro, "descarga", gestor=gestor, bytes=0) as medicion:
+        try:
+            sesion = _obtener_sesion()
+            with sesion.get(url, headers=headers, timeout=TIMEOUT_DESCARGA, stream=True) as response:
+                medicion["status"] = response.status_code
+                if response.status_code == 304 and previo is not None:
+                    medicion["filas_salida"] = len(previo["df"])
+                    return previo["df"]
+                response.raise_for_status()
+
+                response.raw.decode_content = True
+                try:
+                    df, medicion["bytes"] = leer_csv_en_flujo(response.raw, gestor)
+                except EsquemaNoCalza as e:
+                    df = None
+                    medicion["esquema"] = str(e)
+            if df is None:
+                # El flujo ya se consumió: se descarga completo y se parsea con el respaldo de pandas
+                response = sesion.get(url, timeout=TIMEOUT_DESCARGA)
+                response.raise_for_status()
+                medicion["bytes"] += len(response.content)
+                df = leer_csv(response.content, gestor)
+            medicion["filas_salida"] = len(df)
+
+            _cache_descargas[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "df": df,
+            }
+            return df
+        except Exception as e:
+            medicion["error"] = str(e)
+            print(f"Error al descargar {url}: {e}")
+            if previo is not None:
+                medicion["filas_salida"] = len(previo["df"])
+                return previo["df"]
+            medicion["filas_salida"] = 0
+            return pd.DataFrame()
+
+
+def descargar_fuentes(fuentes, registro=None):
+    """Descarga en paralelo cada fuente {gestor: url}; una falla no afecta a las demás."""
+    with ThreadPoolExecutor(max_workers=max(len(fuentes), 1)) as executor:
+        futuros = {gestor: executor.submit(download_csv, url, registro, gestor) for gestor, url in fuentes.items()}
+    return {gestor: futuro.result() for gestor, futuro in futuros.items()}
+
+
+# Códigos de alarma → descripción
+MAPEO_ALARMAS = {
+    1014: "The link between the server and the NE is broken",
+    400123: "Card Offline",
+    35273: "[GPON Alarm] PON LOS (Loss of signal)",
+    430660006: "[GPON Alarm] PON LOS (ONU Dropped)",
+    351130000: "[GPON Alarm] ONU LOS (Loss of Signal)",
+    722445000: "[GPON Alarm] ONU LOS (Loss of Signal)"
+}
+
+
 def map_name_alarm(code):
     """Mapea códigos de alarma a descripciones."""
-    mapping = {
-        1014: "The link between the server and the NE is broken",
-        400123: "Card Offline",
-        35273: "[GPON Alarm] PON LOS (Loss of signal)",
-        430660006: "[GPON Alarm] PON LOS (ONU Dropped)",
-        351130000: "[GPON Alarm] ONU LOS (Loss of Signal)",
-        722445000: "[GPON Alarm] ONU LOS (Loss of Signal)"
-    }
-    return mapping.get(code, "")
+    return MAPEO_ALARMAS.get(code, "")
 def limpiar_num(x):
+    if x is pd.NA:
+        return "nan"  # vacío en columnas enteras nullable, igual que NaN en float
     try:
         # Convertir 2.0 -> 2 y mantener texto normal
         return str(int(float(x))) if str(x).replace('.', '', 1).isdigit() else str(x)
     except:
         return str(x)
 
-def get_alarmas():
-    """Descarga y combina alarmas de Huawei y ZTE + une datos de clientes activos."""
-    
-    # Descargar alarmas
-    huawei_df = download_csv(URL_HUAWEI)
-    zte_df = download_csv(URL_ZTE)
 
-    if not huawei_df.empty:
-        huawei_df["Gestor"] = "Huawei"
-    if not zte_df.empty:
-        zte_df["Gestor"] = "ZTE"
+def _por_valor_unico(serie, funcion):
+    """Aplica `funcion` solo a los valores distintos de la columna.
+
+    Devuelve (codigos, resultados): resultados[codigos] reproduce
+    serie.apply(funcion) sin recorrer fila por fila en Python.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    resultados = np.array([funcion(v) for v in unicos], dtype=object)
+    return codigos, resultados
+
+
+def columna_por_valor_unico(serie, funcion):
+    """Equivalente columnar de serie.apply(funcion) para columnas de baja cardinalidad."""
+    codigos, resultados = _por_valor_unico(serie, funcion)
+    return pd.Series(resultados[codigos], index=serie.index, dtype=object)
+
+
+def construir_dev2(alarmas):
+    """Llave DEV_2 = DEV-FN-SN-PN con FN/SN/PN normalizados como limpiar_num.
 
-    alarmas = pd.concat([huawei_df, zte_df], ignore_index=True)
+    Cada columna se normaliza sobre sus valores distintos y el texto final se
+    arma solo una vez por combinación DEV/FN/SN/PN presente.
+    """
+    partes = [
+        _por_valor_unico(alarmas["DEV"], str),
+        _por_valor_unico(alarmas["FN"], limpiar_num),
+        _por_valor_unico(alarmas["SN"], limpiar_num),
+        _por_valor_unico(alarmas["PN"], limpiar_num),
+    ]
 
-    # Si no hay alarmas, devolvemos vacío
+    # Código combinado en base mixta; si no cabe en int64 se concatena texto directamente
+    tamanos = [len(resultados) for _, resultados in partes]
+    if np.prod(tamanos, dtype=float) >= 2**62:
+        textos = [pd.Series(resultados[codigos], index=alarmas.index) for codigos, resultados in partes]
+        return textos[0] + "-" + textos[1] + "-" + textos[2] + "-" + textos[3]
+
+    combinado = np.zeros(len(alarmas), dtype=np.int64)
+    for (codigos, _), tamano in zip(partes, tamanos):
+        combinado = combinado * tamano + codigos
+    codigos_combo, combos = pd.factorize(combinado)
+
+    # Decodificar cada combinación única a sus cuatro componentes
+    restos = np.asarray(combos, dtype=np.int64)
+    componentes = []
+    for (_, resultados), tamano in zip(reversed(partes), reversed(tamanos)):
+        restos, codigo = np.divmod(restos, tamano)
+        componentes.append(resultados[codigo])
+    dev, fn, sn, pn = reversed(componentes)
+    textos_combo = np.array(
+        [f"{a}-{b}-{c}-{d}" for a, b, c, d in zip(dev, fn, sn, pn)], dtype=object
+    )
+    return pd.Series(textos_combo[codigos_combo], index=alarmas.index, dtype=object)
+
+# Estado del modo incremental: último resultado y huellas por SerialNo
+_estado_incremental = {}
+_incremental_lock = threading.Lock()
+
+
+def parsear_fecha(serie, formato, dayfirst=False):
+    """Convierte a datetime con formato explícito; solo lo que no calce se infiere."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    fechas = pd.to_datetime(serie, format=formato, errors="coerce")
+    fallidas = fechas.isna() & serie.notna()
+    if fallidas.any():
+        fechas[fallidas] = pd.to_datetime(serie[fallidas], errors="coerce", dayfirst=dayfirst)
+    return fechas
+
+
+def enriquecer(alarmas, registro=None, gestor=None):
+    """Agrega DEV_2, NAME_ALARM, HoraPeru parseada, Cliente_puerto y SerialNumber_TDP."""
     if alarmas.empty:
         return alarmas
-
-    # --- 🔹 Cargar clientes activos desde Parquet ---
-    try:
-        clientes = pd.read_parquet("clientes_activos.parquet")
-        if "Etiquetas de fila" in clientes.columns:
-            clientes = clientes.rename(columns={"Etiquetas de fila": "DEV_2"})
-    except Exception as e:
-        print(f"⚠️ No se pudo cargar clientes_activos.parquet: {e}")
-        clientes = pd.DataFrame()
+    filas = len(alarmas)
 
     # --- 🔹 Crear columnas extra ---
     if all(col in alarmas.columns for col in ["DEV", "FN", "SN", "PN"]):
-        alarmas["DEV_2"] = (
-            alarmas["DEV"].astype(str) + "-" +
-            alarmas["FN"].apply(limpiar_num) + "-" +
-            alarmas["SN"].apply(limpiar_num) + "-" +
-            alarmas["PN"].apply(limpiar_num)
-        )
+        with _etapa(registro, "dev2", gestor=gestor, filas_entrada=filas, filas_salida=filas):
+            alarmas["DEV_2"] = construir_dev2(alarmas)
     
     if "NAME_ALARM" not in alarmas.columns and "FaultID" in alarmas.columns:
-        alarmas["NAME_ALARM"] = alarmas["FaultID"].apply(map_name_alarm)
-
-    # --- 🔹 Buscar cliente por DEV_2 ---
-    if not clientes.empty and "DEV_2" in clientes.columns:
-        clientes = clientes.rename(columns={"Etiquetas de fila": "DEV_2"})
-        
-        # Traer la columna "Total general" como "Cliente_puerto"
-        alarmas = alarmas.merge(
-            clientes[["DEV_2", "Total general"]],
-            on="DEV_2", how="left"
-        )
-        alarmas = alarmas.rename(columns={"Total general": "Cliente_puerto"})
+        with _etapa(registro, "name_alarm", gestor=gestor, filas_entrada=filas, filas_salida=filas):
+            alarmas["NAME_ALARM"] = columna_por_valor_unico(alarmas["FaultID"], map_name_alarm)
 
-    try:
-        clientes_tdp = pd.read_parquet("clientes_TDP.parquet")
-
-        # Asegurar tipos compatibles
-        clientes_tdp["SUBSCRIPCION"] = clientes_tdp["SUBSCRIPCION"].astype(str)
-        alarmas["AditionalInfo"] = alarmas["AditionalInfo"].astype(str)
-
-        # Hacer merge: AditionalInfo ↔ SUBSCRIPCION
-        alarmas = alarmas.merge(
-            clientes_tdp[["SUBSCRIPCION", "SERIAL NUMBER"]],
-            left_on="AditionalInfo",
-            right_on="SUBSCRIPCION",
-            how="left"
-        )
+    with _etapa(registro, "fechas", gestor=gestor, filas_entrada=filas, filas_salida=filas):
+        if "HoraPeru" in alarmas.columns:
+            alarmas["HoraPeru"] = parsear_fecha(alarmas["HoraPeru"], FORMATO_HORA_PERU, dayfirst=True)
+        if "HoraProceso" in alarmas.columns:
+            alarmas["HoraProceso"] = parsear_fecha(alarmas["HoraProceso"], FORMATO_HORA_PROCESO)
+
+    # --- 🔹 Buscar cliente por DEV_2 (índice precargado) ---
+    if "DEV_2" in alarmas.columns:
+        with _etapa(registro, "cruce_clientes_activos", gestor=gestor, filas_entrada=filas, filas_salida=filas) as medicion:
+            cliente_puerto = CLIENTES_ACTIVOS.buscar(alarmas["DEV_2"])
+            if cliente_puerto is not None:
+                alarmas["Cliente_puerto"] = cliente_puerto
+                medicion["tasa"] = float(cliente_puerto.notna().mean())
+
+    # --- 🔹 Serial del ONT: AditionalInfo ↔ SUBSCRIPCION ---
+    if "AditionalInfo" in alarmas.columns:
+        with _etapa(registro, "cruce_clientes_tdp", gestor=gestor, filas_entrada=filas, filas_salida=filas) as medicion:
+            serial_tdp = CLIENTES_TDP.buscar(alarmas["AditionalInfo"])
+            if serial_tdp is not None:
+                # Se mantiene AditionalInfo como texto, igual que en el cruce original
+                alarmas["AditionalInfo"] = alarmas["AditionalInfo"].astype(str)
+                alarmas["SerialNumber_TDP"] = serial_tdp
+                medicion["tasa"] = float(serial_tdp.notna().mean())
+
+    return alarmas
+
+
+def _firma_referencias():
+    """Versión de las tablas de clientes; si cambian hay que re-enriquecer todo."""
+    firma = []
+    for tabla in (CLIENTES_ACTIVOS, CLIENTES_TDP):
+        tabla.indice()  # recarga el índice si el parquet cambió
+        firma.append(tabla.version)
+    return tuple(firma)
+
+
+def _calcular_cruce(alarmas):
+    """Coincidencias de las alarmas contra cada tabla de clientes."""
+    cruce = {}
+    for nombre, tabla, columna in (
+        ("clientes_activos", CLIENTES_ACTIVOS, "DEV_2"),
+        ("clientes_TDP", CLIENTES_TDP, "AditionalInfo"),
+    ):
+        filas = len(alarmas)
+        coincidencias = tabla.coincidencias(alarmas[columna]) if columna in alarmas.columns else 0
+        cruce[nombre] = {
+            "coincidencias": coincidencias,
+            "filas": filas,
+            "tasa": coincidencias / filas if filas else 0.0,
+        }
+    return cruce
+
+
+def _huellas(df):
+    """Hash por fila del contenido crudo (sin HoraProceso ni Gestor), indexado por SerialNo."""
+    columnas = [c for c in df.columns if c not in ("HoraProceso", "Gestor")]
+    huellas = pd.util.hash_pandas_object(df[columnas], index=False)
+    huellas.index = df["SerialNo"].to_numpy()
+    return huellas
+
+
+def _con_hora_proceso(conservadas, df):
+    """Filas conservadas del snapshot previo con la HoraProceso vigente de la hoja.
+
+    HoraProceso no entra en la huella (cambia en cada exporte sin que cambie la
+    alarma), pero el snapshot debe mostrar la de la hoja nueva, igual que una
+    reconstrucción completa.
+    """
+    if conservadas.empty or "HoraProceso" not in df.columns or "HoraProceso" not in conservadas.columns:
+        return conservadas
+    horas = parsear_fecha(df["HoraProceso"], FORMATO_HORA_PROCESO)
+    horas.index = df["SerialNo"].to_numpy()
+    return conservadas.assign(HoraProceso=conservadas["SerialNo"].map(horas).to_numpy())
+
+
+def _delta_fuente(gestor, df, previo):
+    """Separa una fuente en filas a conservar del snapshot previo y filas a enriquecer.
+
+    Devuelve (huellas, delta, incremental). huellas es None cuando la fuente no
+    tiene un SerialNo único; incremental es False cuando hay que enriquecer la
+    fuente completa.
+    """
+    if df.empty or "SerialNo" not in df.columns or df["SerialNo"].duplicated().any():
+        return None, df, False
+
+    huellas = _huellas(df)
+    huellas_previas = previo["huellas"].get(gestor) if previo else None
+    if huellas_previas is None:
+        return huellas, df, False
+
+    # Nuevas: SerialNo no visto; cambiadas: mismo SerialNo con contenido distinto
+    vistas = huellas.index.isin(huellas_previas.index)
+    anteriores = huellas_previas.reindex(huellas.index, fill_value=0).to_numpy()
+    cambiadas = ~vistas | (anteriores != huellas.to_numpy())
+    return huellas, df[cambiadas], True
+
+
+def get_alarmas(incremental=False):
+    """Descarga y combina alarmas de Huawei y ZTE + une datos de clientes activos.
+
+    En modo incremental solo se enriquecen las filas nuevas o modificadas
+    (según SerialNo y su huella de contenido); el resto se toma del resultado
+    anterior y se descartan las alarmas que ya no figuran en la hoja.
+
+    Cada refresco queda registrado por etapas en METRICAS (scripts.metricas).
+    """
+    with METRICAS.refresco(incremental=incremental) as registro:
+        alarmas = _procesar_alarmas(incremental, registro)
+        registro.filas = len(alarmas)
+        return alarmas
+
+
+def _procesar_alarmas(incremental, registro):
+    # Descargar alarmas
+    fuentes = descargar_fuentes({"Huawei": URL_HUAWEI, "ZTE": URL_ZTE}, registro)
+
+    for gestor, df in fuentes.items():
+        if not df.empty:
+            df["Gestor"] = gestor
+
+    with _incremental_lock:
+        with _etapa(registro, "indices_clientes"):
+            firma = _firma_referencias()
+        previo = _estado_incremental if incremental and _estado_incremental else None
+        if previo is not None and previo["referencias"] != firma:
+            previo = None
+
+        # Sin cambios en ninguna hoja (304) → se reutiliza el resultado anterior
+        if previo is not None and all(fuentes[g] is previo["crudos"].get(g) for g in fuentes):
+            registro.reutilizado = True
+            registro.cruce = previo["cruce"]
+            registro.memoria_mb = previo["memoria_mb"]
+            return previo["alarmas"]
+
+        partes = []
+        huellas = {}
+        for gestor, df in fuentes.items():
+            with _etapa(registro, "delta", gestor=gestor, filas_entrada=len(df)) as medicion:
+                huellas_fuente, delta, es_incremental = _delta_fuente(gestor, df, previo)
+                medicion.update(filas_salida=len(delta), incremental=es_incremental)
+            if es_incremental:
+                anterior = previo["alarmas"]
+                conservar = (
+                    (anterior["Gestor"] == gestor)
+                    & anterior["SerialNo"].isin(huellas_fuente.index)
+                    & ~anterior["SerialNo"].isin(delta["SerialNo"])
+                )
+                partes.append(_con_hora_proceso(anterior[conservar], df))
+            if not delta.empty:
+                partes.append(enriquecer(delta.copy(), registro, gestor))
+            if huellas_fuente is not None:
+                huellas[gestor] = huellas_fuente
+
+        partes = [p for p in partes if not p.empty]
+        with _etapa(registro, "combinar", filas_entrada=sum(len(p) for p in partes)) as medicion:
+            alarmas = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+            # Snapshot ordenado por HoraPeru para filtrar rangos por búsqueda binaria.
+            # Las partes ya vienen casi ordenadas, por lo que el sort estable es casi lineal.
+            # Las filas sin HoraPeru válida (NaT, al final del orden) no se pueden ubicar en el tiempo.
+            if "HoraPeru" in alarmas.columns:
+                alarmas = alarmas.sort_values("HoraPeru", kind="stable", ignore_index=True)
+                alarmas = alarmas.iloc[:alarmas["HoraPeru"].notna().sum()]
+            medicion["filas_salida"] = len(alarmas)
+        if not alarmas.empty:
+            alarmas = _categorizar(alarmas)
+            registro.memoria_mb = memoria_mb(alarmas)
 
-        # Renombrar columna resultante para mayor claridad
-        alarmas = alarmas.rename(columns={"SERIAL NUMBER": "SerialNumber_TDP"})
+        with _etapa(registro, "cruce", filas_entrada=len(alarmas), filas_salida=len(alarmas)):
+            cruce = _calcular_cruce(alarmas)
+        registro.cruce = cruce
+        _estado_incremental.clear()
+        _estado_incremental.update({
+            "alarmas": alarmas,
+            "crudos": dict(fuentes),
+            "huellas": huellas,
+            "referencias": firma,
+            "cruce": cruce,
+            "memoria_mb": registro.memoria_mb,
+        })
 
-        # Ya no necesitamos la columna SUBSCRIPCION duplicada del parquet
-        alarmas = alarmas.drop(columns=["SUBSCRIPCION"], errors="ignore")
+    return alarmas
 
-        print("✅ Cruce con clientes_TDP.parquet completado.")
-        print("📦 Ejemplo de SerialNumber_TDP encontrados:")
-        print(alarmas["SerialNumber_TDP"].dropna().head(5).to_list())
 
-    except Exception as e:
-        print(f"⚠️ Error al cruzar con clientes_TDP.parquet: {e}")
+def main():
+    """Worker de ingesta sin Streamlit: corre el pipeline cada `intervalo` y publica el snapshot en disco."""
+    from scripts import almacen
 
-    print(alarmas["SerialNumber_TDP"].dropna().head(5).to_list())
-    print("🔎 Ejemplo de DEV_2 en alarmas:")
-    print(alarmas["DEV_2"].dropna().head(5).to_list())
+    parser = argparse.ArgumentParser(description="Publica snapshots de alarmas (Arrow IPC) para las réplicas del dashboard.")
+    parser.add_argument("--directorio", default=os.environ.get("ADCE_SNAPSHOT_DIR", "snapshots"))
+    parser.add_argument("--intervalo", type=float, default=15 * 60, help="Segundos entre refrescos")
+    parser.add_argument("--conservar", type=int, default=almacen.VERSIONES_CONSERVADAS)
+    parser.add_argument("--una-vez", action="store_true", help="Publicar una sola vez y salir")
+    args = parser.parse_args()
+    if args.conservar < 1:
+        parser.error("--conservar debe ser al menos 1")
 
-    if not clientes.empty:
-        print("📋 Ejemplo de Etiquetas de fila en clientes:")
-        print(clientes["DEV_2"].dropna().head(5).to_list())
+    publicado = None
+    while True:
+        inicio = time.monotonic()
+        try:
+            alarmas = get_alarmas(incremental=True)
+            if alarmas.empty:
+                print("⚠️ Sin alarmas; se mantiene el snapshot publicado")
+            elif alarmas is publicado:
+                print("✅ Sin cambios en las hojas; se mantiene el snapshot publicado")
+            else:
+                registro = METRICAS.ultimo()
+                version = almacen.publicar(
+                    alarmas, args.directorio, conservar=args.conservar,
+                    metadatos={
+                        "publicado": time.time(), "segundos": registro["segundos"], "cruce": registro["cruce"],
+                        "memoria_mb": registro["memoria_mb"], "etapas": registro["etapas"],
+                    },
+                )
+                publicado = alarmas
+                print(f"✅ Snapshot v{version} publicado en {args.directorio} ({len(alarmas)} filas, "
+                      f"{time.monotonic() - inicio:.1f} s)")
+        except Exception as e:
+            print(f"⚠️ Error al refrescar alarmas: {e}")
+        if args.una_vez:
+            break
+        time.sleep(max(args.intervalo - (time.monotonic() - inicio), 0))
 
-        # Verificamos coincidencias reales
-        coincidencias = alarmas["DEV_2"].isin(clientes["DEV_2"]).sum()
-        print(f"✅ Coincidencias encontradas: {coincidencias} / {len(alarmas)} filas")
-    else:
-        print("⚠️ Clientes está vacío")
 
-    return alarmas
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Cantidad de refrescos recientes que se conservan en memoria
+MAX_REFRESCOS = 50
+
+
+class RegistroRefresco:
+    """Mediciones de un refresco del pipeline: una entrada por etapa."""
+
+    def __init__(self, incremental=False):
+        self.inicio = time.time()
+        self.incremental = incremental
+        self.segundos = None
+        self.filas = None
+        self.memoria_mb = None
+        self.reutilizado = False
+        self.cruce = {}
+        self.error = None
+        self.etapas = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nombre, **datos):
+        """Mide la duración del bloque; el bloque puede completar el dict (filas_salida, bytes...)."""
+        medicion = {"etapa": nombre, **datos}
+        inicio = time.perf_counter()
+        try:
+            yield medicion
+        except Exception as e:
+            medicion["error"] = str(e)
+            raise
+        finally:
+            medicion["segundos"] = time.perf_counter() - inicio
+            # Las descargas se registran desde varios hilos a la vez
+            with self._lock:
+                self.etapas.append(medicion)
+
+    def como_dict(self):
+        return {
+            "inicio": self.inicio,
+            "segundos": self.segundos,
+            "incremental": self.incremental,
+            "reutilizado": self.reutilizado,
+            "filas": self.filas,
+            "memoria_mb": self.memoria_mb,
+            "cruce": self.cruce,
+            "error": self.error,
+            "etapas": list(self.etapas),
+        }
+
+
+class MetricasPipeline:
+    """Buffer circular con los últimos refrescos, compartido por todo el proceso."""
+
+    def __init__(self, maximo=MAX_REFRESCOS):
+        self._refrescos = deque(maxlen=maximo)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def refresco(self, incremental=False):
+        """Abre un registro, lo cierra con la duración total y lo guarda aunque falle."""
+        registro = RegistroRefresco(incremental)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except Exception as e:
+            registro.error = str(e)
+            raise
+        finally:
+            registro.segundos = time.perf_counter() - inicio
+            with self._lock:
+                self._refrescos.append(registro.como_dict())
+
+    def recientes(self):
+        """Refrescos guardados, del más antiguo al más reciente."""
+        with self._lock:
+            return list(self._refrescos)
+
+    def ultimo(self):
+        with self._lock:
+            return self._refrescos[-1] if self._refrescos else None
+
+    def exportar_jsonl(self):
+        """Un refresco por línea, para analizar fuera del dashboard."""
+        return "".join(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in self.recientes())
+
+
+METRICAS = MetricasPipeline()
@@ -0,0 +1,199 @@
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from cachetools import TTLCache
+
+# API de consulta a las OLT expuesta por ngrok
+NGROK_BASE_URL = "https://leilani-thimblelike-lucklessly.ngrok-free.dev"
+
+# Timeouts (conexión, lectura) en segundos y máximo de consultas simultáneas
+TIMEOUT_API = (5, 20)
+MAX_CONCURRENCIA = 8
+
+# Caché de respuestas exitosas: vigencia corta y tamaño acotado
+TTL_CONSULTAS = 30
+MAX_CONSULTAS_EN_CACHE = 512
+
+# Columnas de interés de cada respuesta según gestor
+COLUMNAS_HUAWEI = ["ALIAS", "LSTDOWNTIME", "LSTUPTIME", "ONTID", "OperState"]
+COLUMNAS_ZTE = ["ONUID", "OperState", "AUTHINFO", "LASTOFFTIME"]
+
+# Prefijo de los campos de la respuesta en la tabla consolidada del lote
+PREFIJO_API = "api."
+
+Peticion = namedtuple("Peticion", ["etiqueta", "gestor", "endpoint", "params"])
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+# Resultados recientes y consultas en curso, por clave de petición
+_cache_consultas = TTLCache(maxsize=MAX_CONSULTAS_EN_CACHE, ttl=TTL_CONSULTAS)
+_en_vuelo = {}
+_cache_lock = threading.Lock()
+
+
+def _obtener_sesion():
+    """Sesión HTTP compartida con pool keep-alive del tamaño de la concurrencia máxima."""
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            # requests se importa recién con la primera consulta: las sesiones que no consultan no lo cargan
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            sesion = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_CONCURRENCIA)
+            sesion.mount("https://", adaptador)
+            sesion.mount("http://", adaptador)
+            _sesion = sesion
+    return _sesion
+
+
+def entero_si_numero(x):
+    """2.0 → 2 para armar los parámetros de la API; deja el texto tal cual."""
+    return int(float(x)) if str(x).replace('.', '', 1).isdigit() else x
+
+
+def peticion_huawei(dev, sn, pn, etiqueta=None):
+    """Consulta /consulta de un puerto Huawei (frame 0)."""
+    params = {"dev": dev, "fn": 0, "sn": entero_si_numero(sn), "pn": entero_si_numero(pn)}
+    return Peticion(etiqueta or f"{dev}-0-{params['sn']}-{params['pn']}", "Huawei", "/consulta", params)
+
+
+def peticion_zte(olt_ip, ontid, sn, pn, etiqueta=None):
+    """Consulta /pruebazte de un puerto ZTE (ponid = 1-ONTID-SN-PN)."""
+    ponid = f"1-{entero_si_numero(ontid)}-{entero_si_numero(sn)}-{entero_si_numero(pn)}"
+    return Peticion(etiqueta or f"{olt_ip} {ponid}", "ZTE", "/pruebazte", {"oltid": olt_ip, "ponid": ponid})
+
+
+def peticion_serial(serial):
+    """Consulta /consulta_serial de un ONT por su serial number."""
+    return Peticion(serial, "Serial", "/consulta_serial", {"serial": serial})
+
+
+def peticion_para_alarma(alarma, etiqueta=None):
+    """Arma la petición de un puerto a partir de una fila del snapshot; None si faltan datos."""
+    gestor = str(alarma.get("Gestor", "")).lower()
+    if gestor == "huawei":
+        return peticion_huawei(alarma["DEV"], alarma["SN"], alarma["PN"], etiqueta)
+    if gestor == "zte" and pd.notna(alarma.get("DID")) and pd.notna(alarma.get("ONTID")):
+        return peticion_zte(alarma["DID"], alarma["ONTID"], alarma["SN"], alarma["PN"], etiqueta)
+    return None
+
+
+def clave_peticion(peticion):
+    """Clave de caché: endpoint + parámetros (serial, dev/fn/sn/pn u oltid/ponid)."""
+    return (peticion.endpoint, tuple(sorted((k, str(v)) for k, v in peticion.params.items())))
+
+
+def consultar(peticion):
+    """Ejecuta una petición y devuelve un dict con ok, status, datos (JSON), texto y error.
+
+    Las respuestas exitosas se reutilizan durante TTL_CONSULTAS segundos y las
+    consultas idénticas simultáneas comparten una sola llamada a la API. El
+    resultado incluye `consultado_en` (epoch) y `desde_cache`.
+    """
+    clave = clave_peticion(peticion)
+    with _cache_lock:
+        guardado = _cache_consultas.get(clave)
+        if guardado is not None:
+            return dict(guardado, etiqueta=peticion.etiqueta, desde_cache=True)
+        en_curso = _en_vuelo.get(clave)
+        if en_curso is None:
+            en_curso = _en_vuelo[clave] = Future()
+            propietario = True
+        else:
+            propietario = False
+
+    if not propietario:
+        return dict(en_curso.result(), etiqueta=peticion.etiqueta, desde_cache=True)
+
+    try:
+        resultado = _consultar_api(peticion)
+        with _cache_lock:
+            if resultado["ok"]:
+                _cache_consultas[clave] = resultado
+            del _en_vuelo[clave]
+        en_curso.set_result(resultado)
+    except BaseException as e:
+        with _cache_lock:
+            _en_vuelo.pop(clave, None)
+        en_curso.set_exception(e)
+        raise
+    return dict(resultado, desde_cache=False)
+
+
+def edad_resultado(resultado):
+    """Segundos desde que se obtuvo el resultado en la API."""
+    return time.time() - resultado["consultado_en"]
+
+
+def _consultar_api(peticion):
+    inicio = time.monotonic()
+    resultado = {"etiqueta": peticion.etiqueta, "gestor": peticion.gestor, "ok": False,
+                 "status": None, "datos": None, "texto": "", "error": None,
+                 "consultado_en": time.time()}
+    try:
+        response = _obtener_sesion().get(
+            f"{NGROK_BASE_URL}{peticion.endpoint}", params=peticion.params, timeout=TIMEOUT_API
+        )
+        resultado["status"] = response.status_code
+        resultado["texto"] = response.text
+        if response.status_code == 200:
+            try:
+                resultado["datos"] = response.json()
+                resultado["ok"] = True
+            except ValueError as e:
+                resultado["error"] = f"Respuesta no es JSON válido: {e}"
+        else:
+            resultado["error"] = f"Error en la API: {response.status_code}"
+    except Exception as e:
+        resultado["error"] = f"Error de conexión: {str(e)}"
+    resultado["duracion_s"] = time.monotonic() - inicio
+    return resultado
+
+
+def consultar_lote(peticiones, max_concurrencia=MAX_CONCURRENCIA):
+    """Lanza las peticiones en paralelo y va entregando cada resultado apenas llega."""
+    peticiones = list(peticiones)
+    if not peticiones:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_concurrencia, len(peticiones))) as executor:
+        futuros = [executor.submit(consultar, peticion) for peticion in peticiones]
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+
+
+def parsear_potencia(valor):
+    """'-21.35 dBm' → -21.35; NaN si no hay un número ('--', vacío, etc.)."""
+    if valor is None:
+        return float("nan")
+    encontrado = re.search(r"-?\d+(?:\.\d+)?", str(valor))
+    return float(encontrado.group()) if encontrado else float("nan")
+
+
+def tabla_resultado(resultado):
+    """Filas de un resultado para la tabla consolidada, con RX/TX como columnas numéricas."""
+    base = {"Consulta": resultado["etiqueta"], "Gestor": resultado["gestor"],
+            "Estado consulta": "✅" if resultado["ok"] else f"❌ {resultado['error']}",
+            "Edad (s)": round(edad_resultado(resultado))}
+    if not resultado["ok"]:
+        return pd.DataFrame([base])
+
+    datos = pd.json_normalize(resultado["datos"])
+    if datos.empty:
+        return pd.DataFrame([base])
+    # Columnas de la API con prefijo: un campo "Gestor" o "Consulta" en el JSON no choca con las nuestras
+    tabla = pd.concat([pd.DataFrame([base] * len(datos)), datos.add_prefix(PREFIJO_API)], axis=1)
+
+    for col in datos.columns:
+        nombre = col.lower().replace(".", "_")
+        if re.search(r"rx_?power|rxpower|rx_optical", nombre):
+            tabla["RX (dBm)"] = datos[col].map(parsear_potencia)
+        elif re.search(r"tx_?power|txpower|tx_optical", nombre):
+            tabla["TX (dBm)"] = datos[col].map(parsear_potencia)
+    return tabla
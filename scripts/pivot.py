@@ -0,0 +1,210 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Llaves de fila y columna de la tabla dinámica por puerto y hora
+INDICE_PIVOT = ["DEV", "Cliente_puerto", "SN", "PN", "HoraPeru"]
+COLUMNA_PIVOT = "Hour"
+VALOR_PIVOT = "SerialNo"
+
+
+def conteo_pivot_table(df, conteos=None):
+    """Conteo por puerto y hora con pd.pivot_table (implementación de referencia).
+
+    Con `conteos`, cada fila aporta ese valor (filas ya agregadas) en lugar de contar SerialNo.
+    """
+    if conteos is not None:
+        return pd.pivot_table(
+            df.assign(_conteo=conteos),
+            index=INDICE_PIVOT,
+            columns=COLUMNA_PIVOT,
+            values="_conteo",
+            aggfunc="sum",
+            fill_value=0,
+            observed=True,
+        )
+    return pd.pivot_table(
+        df,
+        index=INDICE_PIVOT,
+        columns=COLUMNA_PIVOT,
+        values=VALOR_PIVOT,
+        aggfunc="count",
+        fill_value=0,
+        observed=True,
+    )
+
+
+def conteo_por_codigos(df, conteos=None):
+    """Mismo resultado que conteo_pivot_table, contando sobre códigos enteros.
+
+    Cada llave se factoriza ordenada, las filas se agrupan por un código
+    combinado en base mixta y el conteo se hace con np.bincount. Con
+    `conteos` (un entero por fila, p. ej. de un GROUP BY del motor columnar)
+    se suman esos valores en lugar de contar las filas con SerialNo.
+    """
+    claves = INDICE_PIVOT + [COLUMNA_PIVOT]
+    validas = np.ones(len(df), dtype=bool)
+    for col in claves:
+        validas &= df[col].notna().to_numpy()
+
+    codigos, niveles = [], []
+    for col in INDICE_PIVOT:
+        codigo, unicos = pd.factorize(df[col][validas], sort=True)
+        codigos.append(codigo)
+        niveles.append(unicos)
+    hora, horas = pd.factorize(df[COLUMNA_PIVOT][validas], sort=True)
+
+    tamanos = [len(nivel) for nivel in niveles]
+    if np.prod(tamanos, dtype=float) >= 2**62:
+        return conteo_pivot_table(df, conteos)
+
+    combinado = np.zeros(int(validas.sum()), dtype=np.int64)
+    for codigo, tamano in zip(codigos, tamanos):
+        combinado = combinado * tamano + codigo
+    fila, filas = pd.factorize(combinado, sort=True)
+
+    # Solo cuentan las filas con SerialNo (igual que aggfunc="count")
+    if conteos is None:
+        pesos = df[VALOR_PIVOT][validas].notna().to_numpy()
+        pesos = None if pesos.all() else pesos
+    else:
+        pesos = np.asarray(conteos)[validas]
+    conteos = np.bincount(
+        fila * len(horas) + hora,
+        weights=pesos,
+        minlength=len(filas) * len(horas),
+    ).astype(np.int64).reshape(len(filas), len(horas))
+
+    # Decodificar el código combinado de cada fila a los códigos de cada nivel
+    restos = np.asarray(filas, dtype=np.int64)
+    codigos_fila = []
+    for tamano in reversed(tamanos):
+        restos, codigo = np.divmod(restos, tamano)
+        codigos_fila.append(codigo)
+    codigos_fila.reverse()
+    niveles = [pd.Index(nivel) for nivel in niveles]
+
+    # pivot_table (unstack → remove_unused_levels) deja en orden de aparición los niveles de
+    # fila que tienen valores solo en filas con alguna llave nula; se replica ese orden
+    # (las columnas sí quedan ordenadas: pivot_table las ordena al final)
+    reordenadas = False
+    for i, col in enumerate(INDICE_PIVOT):
+        if _tiene_valores_sin_usar(df[col], validas, niveles[i]):
+            niveles[i], codigos_fila[i] = _por_aparicion(niveles[i], codigos_fila[i])
+            reordenadas = True
+    if reordenadas:
+        orden = np.lexsort(codigos_fila[::-1])
+        conteos = conteos[orden]
+        codigos_fila = [codigo[orden] for codigo in codigos_fila]
+
+    indice = pd.MultiIndex(levels=niveles, codes=codigos_fila, names=INDICE_PIVOT)
+    return pd.DataFrame(conteos, index=indice, columns=pd.Index(horas, name=COLUMNA_PIVOT))
+
+
+def _tiene_valores_sin_usar(serie, validas, nivel):
+    """True si la columna tiene valores no nulos que solo aparecen en filas descartadas por otra llave nula."""
+    resto = serie[~validas]
+    resto = resto[resto.notna()]
+    return len(resto) > 0 and not resto.isin(nivel).all()
+
+
+def _por_aparicion(nivel, codigos):
+    """Nivel en el orden de primera aparición de sus códigos, y los códigos remapeados a ese orden."""
+    orden = pd.unique(codigos)
+    rango = np.empty(len(nivel), dtype=np.int64)
+    rango[orden] = np.arange(len(orden))
+    return nivel.take(orden), rango[codigos]
+
+
+def formatear_tabla(conteos):
+    """Agrega Total, quita horas sin alarmas y ordena por Total descendente.
+
+    El orden es estable: a igual Total se respeta el orden de las llaves.
+    """
+    tabla_dinamica = conteos.copy()
+    tabla_dinamica["Total"] = tabla_dinamica.sum(axis=1)
+    tabla_dinamica = tabla_dinamica.loc[:, (tabla_dinamica != 0).any(axis=0)]
+    tabla_dinamica = tabla_dinamica.sort_values(by="Total", ascending=False, kind="stable")
+    tabla_dinamica.columns = tabla_dinamica.columns.map(str)
+    return tabla_dinamica.reset_index()
+
+
+class VistaPivot:
+    """Tabla dinámica con etiquetas precalculadas para buscar y paginar en el servidor.
+
+    Así al navegador solo se envía la página visible y el selector de filas no
+    enumera toda la tabla.
+    """
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.etiquetas = (
+            tabla["DEV"].astype(str) + " - " + tabla["SN"].astype(str) + "-" + tabla["PN"].astype(str)
+        ).to_numpy(dtype=object)
+        self._minusculas = pd.Series(self.etiquetas, dtype=object).str.lower()
+
+    def __len__(self):
+        return len(self.tabla)
+
+    def buscar(self, texto):
+        """Posiciones (en orden de Total) de las filas cuya etiqueta DEV - SN-PN contiene todas las palabras."""
+        palabras = (texto or "").lower().split()
+        if not palabras:
+            return np.arange(len(self.tabla))
+        coincide = np.ones(len(self.tabla), dtype=bool)
+        for palabra in palabras:
+            coincide &= self._minusculas.str.contains(palabra, regex=False).to_numpy()
+        return np.flatnonzero(coincide)
+
+    @staticmethod
+    def paginas(posiciones, filas_por_pagina):
+        return max(1, -(-len(posiciones) // filas_por_pagina))
+
+    def pagina(self, posiciones, numero, filas_por_pagina):
+        """Filas de la página `numero` (desde 1) entre las posiciones dadas."""
+        desde = (numero - 1) * filas_por_pagina
+        return self.tabla.iloc[posiciones[desde:desde + filas_por_pagina]]
+
+
+class MotorPivot:
+    """Caché LRU de tablas dinámicas por versión del snapshot y estado de filtros.
+
+    Las tablas se comparten entre sesiones y deben tratarse como de solo lectura.
+    """
+
+    def __init__(self, max_entradas=32):
+        self.max_entradas = max_entradas
+        self._tablas = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def vista(self, version, filtros, df, contar=None):
+        """VistaPivot para (version, filtros); `df` solo se usa si no está en caché.
+
+        `contar()` reemplaza a conteo_por_codigos(df) (p. ej. el motor columnar).
+        """
+        clave = (version, filtros)
+        with self._lock:
+            vista = self._tablas.get(clave)
+            if vista is not None:
+                self._tablas.move_to_end(clave)
+                self.hits += 1
+                return vista
+            self.misses += 1
+
+        conteos = conteo_por_codigos(df) if contar is None else contar()
+        vista = VistaPivot(formatear_tabla(conteos))
+
+        with self._lock:
+            self._tablas[clave] = vista
+            self._tablas.move_to_end(clave)
+            while len(self._tablas) > self.max_entradas:
+                self._tablas.popitem(last=False)
+        return vista
+
+    def estadisticas(self):
+        """Aciertos, fallos y cantidad de tablas en caché."""
+        return {"hits": self.hits, "misses": self.misses, "entradas": len(self._tablas)}
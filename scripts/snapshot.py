@@ -0,0 +1,183 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Foto inmutable del dataset de alarmas compartida entre sesiones."""
+    data: object
+    version: int
+    creado: float
+    # Estructuras derivadas (índices, agregados) construidas una vez por versión
+    _derivados: dict = field(default_factory=dict, repr=False, compare=False)
+    _lock: object = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def edad(self):
+        """Segundos transcurridos desde que se generó el snapshot."""
+        return time.time() - self.creado
+
+    def derivado(self, nombre, construir):
+        """Devuelve la estructura `nombre`, construyéndola con construir(data) la primera vez."""
+        with self._lock:
+            if nombre not in self._derivados:
+                self._derivados[nombre] = construir(self.data)
+            return self._derivados[nombre]
+
+
+class SnapshotCache:
+    """Guarda un único snapshot por proceso y lo renueva al vencer el TTL.
+
+    Las sesiones solo reciben una referencia al snapshot vigente (no una copia),
+    por lo que el DataFrame debe tratarse como de solo lectura. Mientras se
+    refresca en segundo plano se sigue sirviendo el snapshot anterior, y el
+    nuevo se publica con un único cambio de referencia.
+
+    Con iniciar_programador() el refresco lo hace un hilo propio cada `ttl`
+    segundos, independiente de las interacciones de los usuarios.
+
+    `preparar(anterior, data)`, si se indica, devuelve estructuras derivadas
+    del snapshot nuevo (por ejemplo, la diferencia con el anterior) que se
+    calculan antes de publicarlo; `anterior` es None en la primera carga.
+    """
+
+    # Espera (s) antes de reintentar cuando el programador falla al refrescar
+    REINTENTO_ERROR = 60
+
+    def __init__(self, cargar, ttl, preparar=None):
+        self._cargar = cargar
+        self._preparar = preparar
+        self.ttl = ttl.total_seconds() if hasattr(ttl, "total_seconds") else float(ttl)
+        self._snapshot = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._refrescando = threading.Lock()
+        self._programador = None
+        self._pedido = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.refrescos = 0
+        self.ultimo_error = None
+
+    def obtener(self):
+        """Devuelve el snapshot vigente; solo bloquea si aún no existe ninguno."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                self.misses += 1
+            with self._refrescando:
+                # Otra sesión pudo completar la primera carga mientras esperábamos
+                if self._snapshot is not None:
+                    return self._snapshot
+                return self._refrescar()
+
+        with self._lock:
+            self.hits += 1
+        # Con programador activo las sesiones nunca disparan refrescos
+        if self._programador is None and snapshot.edad > self.ttl:
+            self.refrescar_en_segundo_plano()
+        return snapshot
+
+    def refrescar(self):
+        """Recarga el dataset de forma síncrona y publica el nuevo snapshot."""
+        with self._refrescando:
+            return self._refrescar()
+
+    def refrescar_en_segundo_plano(self):
+        """Lanza un refresco en un hilo aparte si no hay otro en curso."""
+        if not self._refrescando.acquire(blocking=False):
+            return False
+
+        def _tarea():
+            try:
+                self._refrescar()
+            finally:
+                self._refrescando.release()
+
+        threading.Thread(target=_tarea, name="refresco-alarmas", daemon=True).start()
+        return True
+
+    def iniciar_programador(self):
+        """Arranca un hilo que refresca cada `ttl` segundos aunque nadie use el dashboard."""
+        with self._lock:
+            if self._programador is not None:
+                return
+            self._programador = threading.Thread(target=self._ciclo, name="programador-alarmas", daemon=True)
+        self._programador.start()
+
+    def solicitar_actualizacion(self):
+        """Encola un refresco inmediato sin bloquear a quien lo pide."""
+        if self._programador is None:
+            return self.refrescar_en_segundo_plano()
+        self._pedido.set()
+        return True
+
+    def _ciclo(self):
+        while True:
+            snapshot = self._snapshot
+            restante = self.ttl - snapshot.edad if snapshot is not None else 0
+            if restante > 0 and not self._pedido.is_set():
+                self._pedido.wait(timeout=restante)
+                continue
+
+            self._pedido.clear()
+            try:
+                self.refrescar()
+            except Exception:
+                pass
+            if self.ultimo_error is not None:
+                self._pedido.wait(timeout=self.REINTENTO_ERROR)
+
+    def _refrescar(self):
+        try:
+            data = self._cargar()
+        except Exception as e:
+            self.ultimo_error = str(e)
+            print(f"⚠️ Error al refrescar alarmas: {e}")
+            if self._snapshot is None:
+                raise
+            return self._snapshot
+
+        # Solo hay un refresco a la vez: se prepara fuera del lock mientras se sigue sirviendo el anterior
+        anterior = self._snapshot
+        derivados = {}
+        if self._preparar is not None and (anterior is None or data is not anterior.data):
+            try:
+                derivados = dict(self._preparar(anterior, data))
+            except Exception as e:
+                print(f"⚠️ Error al preparar el snapshot: {e}")
+
+        with self._lock:
+            # Si el pipeline devolvió el mismo DataFrame (sin cambios) se conserva la versión
+            # y las estructuras derivadas ya construidas
+            if self._snapshot is not None and data is self._snapshot.data:
+                self._snapshot = Snapshot(
+                    data=data, version=self._version, creado=time.time(),
+                    _derivados=self._snapshot._derivados, _lock=self._snapshot._lock,
+                )
+            else:
+                self._version += 1
+                self._snapshot = Snapshot(data=data, version=self._version, creado=time.time(), _derivados=derivados)
+            self.refrescos += 1
+            self.ultimo_error = None
+            return self._snapshot
+
+    @property
+    def actualizando(self):
+        """Indica si hay un refresco en curso."""
+        return self._refrescando.locked()
+
+    def estadisticas(self):
+        """Resumen de aciertos, fallos y edad del snapshot vigente."""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else 0,
+            "edad_s": snapshot.edad if snapshot else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refrescos": self.refrescos,
+            "actualizando": self.actualizando,
+            "programador": self._programador is not None,
+            "ultimo_error": self.ultimo_error,
+        }
@@ -0,0 +1,218 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Ventanas deslizantes del detector de flapping (etiqueta → duración)
+VENTANAS = {
+    "5 min": pd.Timedelta(minutes=5),
+    "1 h": pd.Timedelta(hours=1),
+    "24 h": pd.Timedelta(hours=24),
+}
+
+# Puerto PON al que se atribuye cada alarma
+LLAVE_PUERTO = ["Gestor", "DEV", "SN", "PN"]
+
+# NAME_ALARM es la descripción de FaultID (map_name_alarm): PON LOS y ONU LOS
+PATRON_LOS = r"\b(?:PON|ONU) LOS\b"
+
+# Minutos previos a la marca de agua que se recalculan en cada refresco (alarmas que llegan tarde)
+MARGEN_RETRASO = pd.Timedelta(minutes=10)
+
+# Minutos distintos con LOS dentro de la ventana a partir de los cuales se marca el puerto
+MIN_MINUTOS_FLAPPING = 3
+
+
+def _minutos(horas):
+    """datetime64 → minutos enteros desde epoch."""
+    return np.asarray(horas, dtype="datetime64[m]").astype(np.int64)
+
+
+def mascara_los(df):
+    """Filas de pérdida de señal (PON LOS / ONU LOS), evaluando el patrón solo sobre los valores distintos."""
+    if "NAME_ALARM" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    codigos, unicos = pd.factorize(df["NAME_ALARM"])
+    es_los = np.asarray(pd.Index(unicos).astype(str).str.contains(PATRON_LOS, regex=True), dtype=bool)
+    return (codigos >= 0) & np.append(es_los, False)[codigos]
+
+
+class DetectorFlapping:
+    """Conteo de alarmas LOS por puerto y minuto para ventanas deslizantes.
+
+    Guarda cubetas (minuto, puerto, eventos) de la ventana más larga. En cada
+    snapshot nuevo solo se recalcula la cola desde la última marca de agua
+    (menos MARGEN_RETRASO); las cubetas más viejas que la ventana más larga se
+    descartan. El ranking de cada ventana sale de np.bincount sobre las cubetas
+    y se guarda hasta el próximo snapshot.
+
+    Compartido por todas las sesiones: actualizar() con una versión ya
+    procesada o anterior no hace nada.
+    """
+
+    def __init__(self, ventanas=VENTANAS, margen=MARGEN_RETRASO):
+        self.ventanas = dict(ventanas)
+        self._retencion = int(max(self.ventanas.values()) / pd.Timedelta(minutes=1))
+        self._margen = int(margen / pd.Timedelta(minutes=1))
+        self.version = None
+        self.filas_procesadas = 0
+        self.reconstrucciones = 0
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._referencia = None
+        self._ids = {}
+        self._puertos = None
+        self._clientes = np.empty(0, dtype=float)
+        self._minuto = np.empty(0, dtype=np.int64)
+        self._puerto = np.empty(0, dtype=np.int64)
+        self._eventos = np.empty(0, dtype=np.int64)
+        self._rankings = {}
+
+    @property
+    def referencia(self):
+        """Minuto más reciente con alarmas: fin de todas las ventanas."""
+        return None if self._referencia is None else pd.Timestamp(np.datetime64(self._referencia, "m"))
+
+    @property
+    def cubetas(self):
+        return len(self._minuto)
+
+    def actualizar(self, version, df):
+        """Incorpora el snapshot `version`; devuelve las filas que se recorrieron."""
+        with self._lock:
+            # Una sesión que todavía dibuja el snapshot previo no debe retroceder el detector
+            if self.version is not None and version <= self.version:
+                return 0
+            self.version = version
+            self._rankings = {}
+            if df.empty or "HoraPeru" not in df.columns:
+                self._reiniciar()
+                self.filas_procesadas = 0
+                return 0
+
+            horas = df["HoraPeru"]
+            ordenado = horas.is_monotonic_increasing
+            fin = _minutos(horas.iloc[-1] if ordenado else horas.max())
+            if self._referencia is None or fin < self._referencia:
+                # Primer snapshot o datos reemplazados por otros más viejos: desde cero
+                self._reiniciar()
+                self.reconstrucciones += 1
+                corte = fin - self._retencion + 1
+            else:
+                corte = max(self._referencia - self._margen, fin - self._retencion + 1)
+
+            desde = np.datetime64(int(corte), "m")
+            if ordenado:
+                tramo = df.iloc[horas.searchsorted(desde, side="left"):]
+            else:
+                tramo = df[(horas >= desde).to_numpy()]
+            self._incorporar(tramo, corte, fin)
+            self.filas_procesadas = len(tramo)
+            return len(tramo)
+
+    def _incorporar(self, tramo, corte, fin):
+        validas = mascara_los(tramo)
+        for col in LLAVE_PUERTO:
+            validas &= tramo[col].notna().to_numpy()
+
+        # Código combinado del puerto sobre los valores distintos de la cola
+        combinado = np.zeros(int(validas.sum()), dtype=np.int64)
+        niveles = []
+        for col in LLAVE_PUERTO:
+            codigo, unicos = pd.factorize(tramo[col][validas])
+            combinado = combinado * len(unicos) + codigo
+            niveles.append(unicos)
+        fila, combinados = pd.factorize(combinado)
+
+        # Atributos de cada puerto distinto de la cola (texto para Gestor y DEV)
+        restos = np.asarray(combinados, dtype=np.int64)
+        columnas = {}
+        for col, unicos in zip(reversed(LLAVE_PUERTO), reversed(niveles)):
+            restos, codigo = np.divmod(restos, len(unicos))
+            valores = pd.Series(unicos.take(codigo))
+            columnas[col] = valores.astype(object) if isinstance(valores.dtype, pd.CategoricalDtype) else valores
+        puertos_cola = pd.DataFrame({col: columnas[col] for col in LLAVE_PUERTO})
+
+        # Ids estables entre snapshots: los puertos nuevos se agregan al final de la tabla
+        # (crece como mucho hasta la cantidad de puertos de la red)
+        llaves = list(zip(*(puertos_cola[col].tolist() for col in LLAVE_PUERTO)))
+        if self._puertos is None:
+            self._ids = dict(zip(llaves, range(len(llaves))))
+            self._puertos = puertos_cola
+            puerto_cola = np.arange(len(llaves), dtype=np.int64)
+        else:
+            conocidos = len(self._puertos)
+            puerto_cola = np.fromiter(
+                (self._ids.setdefault(llave, len(self._ids)) for llave in llaves), dtype=np.int64, count=len(llaves)
+            )
+            nuevos = puerto_cola >= conocidos
+            if nuevos.any():
+                self._puertos = pd.concat([self._puertos, puertos_cola[nuevos]], ignore_index=True)
+        puerto = puerto_cola[fila]
+        n = len(self._puertos)
+
+        # Clientes del puerto: último valor informado
+        if len(self._clientes) < n:
+            self._clientes = np.append(self._clientes, np.full(n - len(self._clientes), np.nan))
+        if "Cliente_puerto" in tramo.columns:
+            clientes = pd.Series(tramo["Cliente_puerto"][validas].to_numpy(dtype=float, na_value=np.nan))
+            ultimos = clientes.groupby(puerto).last().dropna()
+            self._clientes[ultimos.index.to_numpy()] = ultimos.to_numpy()
+
+        # Cubetas nuevas ordenadas por minuto (desde el corte) y luego por puerto
+        minuto = _minutos(tramo["HoraPeru"].to_numpy()[validas]) - corte
+        claves, eventos = np.unique(minuto * n + puerto, return_counts=True)
+        minutos_nuevos, puertos_nuevos = np.divmod(claves, n)
+
+        # Se conservan las cubetas previas al corte que siguen dentro de la ventana más larga
+        inicio = np.searchsorted(self._minuto, fin - self._retencion, side="right")
+        fin_previas = np.searchsorted(self._minuto, corte, side="left")
+        self._minuto = np.concatenate([self._minuto[inicio:fin_previas], minutos_nuevos + corte])
+        self._puerto = np.concatenate([self._puerto[inicio:fin_previas], puertos_nuevos])
+        self._eventos = np.concatenate([self._eventos[inicio:fin_previas], eventos.astype(np.int64)])
+        self._referencia = int(fin)
+
+    def _conteos(self, duracion):
+        """Eventos y minutos con LOS por puerto dentro de la ventana que termina en la referencia."""
+        limite = self._referencia - int(duracion / pd.Timedelta(minutes=1))
+        inicio = np.searchsorted(self._minuto, limite, side="right")
+        puertos = self._puerto[inicio:]
+        n = len(self._puertos)
+        eventos = np.bincount(puertos, weights=self._eventos[inicio:], minlength=n).astype(np.int64)
+        minutos = np.bincount(puertos, minlength=n)
+        return eventos, minutos, inicio
+
+    def ranking(self, ventana):
+        """Puertos con LOS en la ventana, del que más minutos distintos tuvo alarmas al que menos.
+
+        Un corte aislado genera muchas alarmas en el mismo minuto; un puerto que
+        flapea las repite en minutos distintos, por eso se ordena primero por
+        minutos y a igualdad por eventos. Incluye los eventos de cada ventana.
+        """
+        with self._lock:
+            if ventana in self._rankings:
+                return self._rankings[ventana]
+            columnas = LLAVE_PUERTO + ["Cliente_puerto", "Minutos con LOS"] + [f"LOS {v}" for v in self.ventanas] + ["Último LOS"]
+            if self._referencia is None or self._puertos is None or self._puertos.empty:
+                return pd.DataFrame(columns=columnas)
+
+            eventos, minutos, inicio = self._conteos(self.ventanas[ventana])
+            seleccion = np.flatnonzero(minutos)
+            orden = np.lexsort((-eventos[seleccion], -minutos[seleccion]))
+            seleccion = seleccion[orden]
+
+            ultimo = np.full(len(self._puertos), -1, dtype=np.int64)
+            np.maximum.at(ultimo, self._puerto[inicio:], self._minuto[inicio:])
+
+            tabla = self._puertos.take(seleccion).reset_index(drop=True)
+            tabla["Cliente_puerto"] = self._clientes[seleccion]
+            tabla["Minutos con LOS"] = minutos[seleccion]
+            for etiqueta, duracion in self.ventanas.items():
+                tabla[f"LOS {etiqueta}"] = (
+                    eventos[seleccion] if etiqueta == ventana else self._conteos(duracion)[0][seleccion]
+                )
+            tabla["Último LOS"] = ultimo[seleccion].astype("datetime64[m]").astype("datetime64[ns]")
+            self._rankings[ventana] = tabla
+            return tabla